@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Local load test for the Nizhny Novgorod guide API.
+Starts server.py (in-process by default, or under uvicorn) on the chosen
+storage backend, seeds it through POST /api/init-data, then drives
+concurrent load at every endpoint and reports throughput and p50/p95/p99
+latency. Results can be saved as a baseline and later runs compared against
+it to catch regressions.
+
+    python bench_load.py                                  # in-process, in-memory storage
+    python bench_load.py --storage mongo                  # in-process, local MongoDB
+    python bench_load.py --storage sqlite --uvicorn --workers 2
+    python bench_load.py --url http://localhost:8001      # an already running server
+    python bench_load.py --save-baseline baseline.json
+    python bench_load.py --compare baseline.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+ROOT_DIR = Path(__file__).parent
+ADMIN_AUTH = {"Authorization": "Basic " + base64.b64encode(b"admin:admin123").decode()}
+
+# Contact form limits would otherwise turn the POST scenario into a 429 benchmark
+BENCH_ENV = {
+    "CONTACT_IP_RATE_PER_MINUTE": "100000000",
+    "CONTACT_IP_BURST": "100000000",
+    "CONTACT_EMAIL_RATE_PER_MINUTE": "100000000",
+    "CONTACT_EMAIL_BURST": "100000000",
+    "CONTACT_QUEUE_SIZE": "100000",
+}
+
+
+class Scenario:
+    def __init__(self, name, method, path, params=None, headers=None, body=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.params = params
+        self.headers = headers or {}
+        self.body = body
+
+    def request_kwargs(self, index):
+        kwargs = {"params": self.params, "headers": self.headers}
+        if self.body is not None:
+            kwargs["json"] = self.body(index)
+        return kwargs
+
+
+def build_scenarios(city_id):
+    run = uuid.uuid4().hex[:8]
+    return [
+        Scenario("cities", "GET", "/api/cities"),
+        Scenario("cities summary", "GET", "/api/cities", params={"view": "summary"}),
+        Scenario("cities gzip", "GET", "/api/cities", headers={"Accept-Encoding": "gzip"}),
+        Scenario("cities stream", "GET", "/api/cities", headers={"Accept": "application/x-ndjson"}),
+        Scenario("city detail", "GET", f"/api/cities/{city_id}"),
+        Scenario("history", "GET", "/api/history"),
+        Scenario("history century", "GET", "/api/history", params={"century": 19}),
+        Scenario("culture", "GET", "/api/culture"),
+        Scenario("culture category", "GET", "/api/culture", params={"category": "craft"}),
+        Scenario("culture facets", "GET", "/api/culture/facets"),
+        Scenario("bundle", "GET", "/api/bundle"),
+        Scenario("bundle 304", "GET", "/api/bundle", headers={"If-None-Match": "*"}),
+        Scenario("search", "GET", "/api/search", params={"q": "нижегородский кремль"}),
+        Scenario("contact inbox", "GET", "/api/contact", headers=ADMIN_AUTH),
+        Scenario(
+            "contact submit", "POST", "/api/contact",
+            body=lambda index: {
+                "name": "Нагрузочный тест",
+                "email": f"bench-{run}-{index}@example.com",
+                "message": f"Сообщение {run} #{index}",
+            },
+        ),
+        Scenario("metrics", "GET", "/metrics"),
+    ]
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+async def run_scenario(client, scenario, requests_count, concurrency, warmup):
+    for index in range(warmup):
+        await client.request(scenario.method, scenario.path, **scenario.request_kwargs(-index - 1))
+    latencies = []
+    errors = 0
+    indexes = iter(range(requests_count))
+
+    async def worker():
+        nonlocal errors
+        for index in indexes:
+            started = time.perf_counter()
+            response = await client.request(scenario.method, scenario.path, **scenario.request_kwargs(index))
+            await response.aread()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def seed(client):
+    response = await client.post("/api/init-data", headers=ADMIN_AUTH)
+    response.raise_for_status()
+    cities = (await client.get("/api/cities", params={"view": "summary"})).json()
+    return cities[0]["id"]
+
+
+async def run_all(client, args):
+    city_id = await seed(client)
+    results = {}
+    for scenario in build_scenarios(city_id):
+        if args.only and scenario.name not in args.only:
+            continue
+        results[scenario.name] = await run_scenario(client, scenario, args.requests, args.concurrency, args.warmup)
+        print_row(scenario.name, results[scenario.name])
+    return results
+
+
+async def run_in_process(args):
+    import server
+
+    # Per-request log lines would dominate the output and the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await server.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await run_all(client, args)
+    finally:
+        if args.drop_database:
+            await server.storage.drop()
+        await server.app.router.shutdown()
+
+
+async def run_over_http(base_url, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        return await run_all(client, args)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(args):
+    port = free_port()
+    command = [
+        sys.executable, "-m", "uvicorn", "server:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=os.environ.copy())
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("uvicorn did not become ready within 30s")
+
+
+def print_header():
+    print(f"{'endpoint':<20}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+
+def print_row(name, result):
+    print(
+        f"{name:<20}{result['requests']:>9}{result['errors']:>8}{result['rps']:>10.1f}"
+        f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+    )
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    # A scenario regresses when p95 grows or throughput drops by more than tolerance
+    regressions = []
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        if result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms")
+        if result["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['rps']:.1f} -> {result['rps']:.1f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--uvicorn", action="store_true", help="start server.py under uvicorn instead of in-process")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (with --uvicorn)")
+    parser.add_argument("--storage", choices=("memory", "sqlite", "mongo"), default="memory", help="storage backend")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=f"bench_{os.getpid()}", help="database to seed (dropped afterwards in-process)")
+    parser.add_argument("--sqlite-path", default=os.path.join(tempfile.gettempdir(), f"bench_{os.getpid()}.sqlite3"))
+    parser.add_argument("--keep-database", dest="drop_database", action="store_false")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per endpoint")
+    parser.add_argument("--only", nargs="*", help="endpoint names to run")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH", help="fail if results regress against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+    if args.uvicorn and args.storage == "memory" and args.workers > 1:
+        parser.error("in-memory storage is per process; use --storage sqlite or mongo with several workers")
+
+    os.environ["STORAGE_BACKEND"] = args.storage
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db_name
+    os.environ["SQLITE_PATH"] = args.sqlite_path
+    for name, value in BENCH_ENV.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, str(ROOT_DIR))
+
+    mode = "url" if args.url else "uvicorn" if args.uvicorn else "in-process"
+    if args.url:
+        print(f"Mode: {mode}, {args.requests} requests per endpoint, concurrency {args.concurrency}")
+    else:
+        print(f"Mode: {mode}, storage {args.storage}, {args.requests} requests per endpoint, concurrency {args.concurrency}")
+    print_header()
+    if args.url:
+        results = asyncio.run(run_over_http(args.url.rstrip("/"), args))
+    elif args.uvicorn:
+        process, base_url = start_uvicorn(args)
+        try:
+            results = asyncio.run(run_over_http(base_url, args))
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+    else:
+        results = asyncio.run(run_in_process(args))
+    if args.storage == "sqlite" and args.drop_database and not args.url:
+        for suffix in ("", "-wal", "-shm"):
+            Path(args.sqlite_path + suffix).unlink(missing_ok=True)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "mode": mode,
+        "storage": None if args.url else args.storage,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        recorded = (baseline["mode"], baseline.get("storage"), baseline["concurrency"])
+        if recorded != (report["mode"], report["storage"], report["concurrency"]):
+            print(f"Warning: baseline was recorded with mode={recorded[0]}, storage={recorded[1]}, concurrency={recorded[2]}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions against {args.compare} (commit {baseline.get('commit')}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for the public list endpoints.
+Compares the original model path (validate every document into a Pydantic
+model, then jsonable_encoder + json.dumps) with the trusted fast path used
+by server.py. Runs offline: no MongoDB connection is made.
+
+    python bench_serialization.py --copies 50 --repeat 20
+
+With orjson and the sample data replicated 50x, the fast path measured
+about 8x faster for cities and 4-5x for history and culture.
+"""
+
+import argparse
+import json
+import os
+import time
+import warnings
+
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+import server  # noqa: E402
+
+
+def sample_documents():
+    # Documents as init_sample_data writes them
+    samples = {
+        "cities": (server.City, server.SAMPLE_CITIES),
+        "history_events": (server.HistoryEvent, server.SAMPLE_HISTORY),
+        "culture_items": (server.CultureItem, server.SAMPLE_CULTURE),
+    }
+    return {
+        name: [server.prepare_for_mongo(model(**item).dict()) for item in items]
+        for name, (model, items) in samples.items()
+    }
+
+
+def model_path(model, documents):
+    items = [model(**document) for document in documents]
+    return json.dumps(
+        jsonable_encoder(items),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def fast_path(model, documents):
+    return server.dump_json(server.serialize_documents(model, documents))
+
+
+def timed(function, model, documents, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(model, documents)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=50, help="replicate the sample data this many times")
+    parser.add_argument("--repeat", type=int, default=20, help="timing runs per path (best is reported)")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", DeprecationWarning)
+    documents = sample_documents()
+    models = {"cities": server.City, "history_events": server.HistoryEvent, "culture_items": server.CultureItem}
+    print(f"JSON encoder: {'orjson' if server.orjson else 'stdlib json'}")
+    print(f"{'collection':<16}{'docs':>7}{'model ms':>12}{'fast ms':>12}{'speedup':>10}")
+    for name, model in models.items():
+        docs = documents[name] * args.copies
+        if model_path(model, docs) != fast_path(model, docs):
+            raise SystemExit(f"{name}: fast path output differs from the model path")
+        slow = timed(model_path, model, docs, args.repeat)
+        fast = timed(fast_path, model, docs, args.repeat)
+        print(f"{name:<16}{len(docs):>7}{slow * 1000:>12.2f}{fast * 1000:>12.2f}{slow / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,256 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, monitoring
 import os
+import re
+import asyncio
+import gzip
+import json
+import math
+import time
+import bisect
+import base64
+import binascii
+import hashlib
 import logging
+import threading
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
 import uuid
-from datetime import datetime, timezone
+import importlib.util
+from datetime import datetime, timedelta, timezone
 import secrets
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+from storage import MemoryStorage, MongoStorage, SQLiteStorage, WatchUnsupported, read_preference
+from storage import matches as document_matches
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Only gzip variants are served
+    brotli = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Prometheus metrics, exported on /metrics. With several uvicorn workers set
+# PROMETHEUS_MULTIPROC_DIR so the samples of all workers are aggregated.
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests currently being served", ["method"], multiprocess_mode="livesum",
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size by route", ["method", "route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, float("inf")),
+)
+CONTENT_CACHE_REQUESTS = Counter(
+    "content_cache_requests_total", "Content cache lookups by result (hit, coalesced, miss, expired)", ["collection", "result"],
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ["collection", "command", "status"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, float("inf")),
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections", "MongoDB pool connections by state (open, in_use, waiting)", ["address", "state"],
+    multiprocess_mode="livesum",
+)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    # pymongo calls these from Motor's worker threads; prometheus_client is thread-safe
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        # getMore names the cursor id first and the collection separately
+        target = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def _observe(self, event, status: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name, status).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event):
+        self._observe(event, "ok")
+
+    def failed(self, event):
+        self._observe(event, "error")
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    # Connection counts per server, from the driver's pool events
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[str, Dict[str, int]] = {}
+
+    def _change(self, address, state: str, delta: int):
+        address = "%s:%s" % address
+        with self._lock:
+            pool = self._pools.setdefault(address, {"open": 0, "in_use": 0, "waiting": 0})
+            pool[state] += delta
+        MONGO_POOL_CONNECTIONS.labels(address, state).inc(delta)
+
+    def snapshot(self, max_pool_size: int) -> Dict[str, dict]:
+        with self._lock:
+            pools = {address: dict(pool) for address, pool in self._pools.items()}
+        for pool in pools.values():
+            pool["saturation"] = round(pool["in_use"] / max_pool_size, 3) if max_pool_size else 0.0
+        return pools
+
+    def connection_created(self, event):
+        self._change(event.address, "open", 1)
+
+    def connection_closed(self, event):
+        self._change(event.address, "open", -1)
+
+    def connection_check_out_started(self, event):
+        self._change(event.address, "waiting", 1)
+
+    def connection_check_out_failed(self, event):
+        self._change(event.address, "waiting", -1)
+
+    def connection_checked_out(self, event):
+        self._change(event.address, "waiting", -1)
+        self._change(event.address, "in_use", 1)
+
+    def connection_checked_in(self, event):
+        self._change(event.address, "in_use", -1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: no extra task or body buffering per request
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            # Route templates keep label cardinality bounded
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(time.perf_counter() - started)
+            HTTP_RESPONSE_SIZE.labels(method, route).observe(size)
+
+def metrics_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+# Storage backend: STORAGE_BACKEND=mongo|sqlite|memory, MongoDB by default.
+# sqlite keeps the data in the SQLITE_PATH file next to the API; memory loses
+# everything on restart and must be chosen explicitly.
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')
+SQLITE_PATH = os.environ.get('SQLITE_PATH', str(ROOT_DIR / 'guide.sqlite3'))
+
+# Public content collections, served from the read-through cache below
+CONTENT_COLLECTIONS = ("cities", "history_events", "culture_items")
+
+# MongoDB connection pool and timeouts. Options given here override the same
+# options in MONGO_URL; unset ones keep the driver defaults.
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+# Wire compression, e.g. "zstd,snappy,zlib" (zstd and snappy need extra packages)
+MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS')
+# Public content reads go to secondaries when the deployment has them; writes,
+# the contact inbox and other admin data always use the primary. After a write
+# the writing process reads that collection from the primary for
+# MONGO_PRIMARY_AFTER_WRITE_SECONDS so it never re-caches a lagging copy.
+MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'secondaryPreferred')
+MONGO_MAX_STALENESS_SECONDS = int(os.environ.get('MONGO_MAX_STALENESS_SECONDS', '-1'))
+MONGO_PRIMARY_AFTER_WRITE_SECONDS = float(os.environ.get('MONGO_PRIMARY_AFTER_WRITE_SECONDS', '30'))
+
+mongo_pool_metrics = MongoPoolMetrics()
+
+def mongo_client_options() -> dict:
+    options = {
+        'maxPoolSize': MONGO_MAX_POOL_SIZE,
+        'minPoolSize': MONGO_MIN_POOL_SIZE,
+        'connectTimeoutMS': MONGO_CONNECT_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'event_listeners': [MongoCommandMetrics(), mongo_pool_metrics],
+    }
+    for option, variable in (
+        ('maxIdleTimeMS', 'MONGO_MAX_IDLE_TIME_MS'),
+        ('waitQueueTimeoutMS', 'MONGO_WAIT_QUEUE_TIMEOUT_MS'),
+        ('socketTimeoutMS', 'MONGO_SOCKET_TIMEOUT_MS'),
+    ):
+        if os.environ.get(variable):
+            options[option] = int(os.environ[variable])
+    if MONGO_COMPRESSORS:
+        options['compressors'] = MONGO_COMPRESSORS
+    return options
+
+def create_storage():
+    if STORAGE_BACKEND == 'mongo':
+        if not os.environ.get('MONGO_URL') or not os.environ.get('DB_NAME'):
+            raise RuntimeError("MONGO_URL and DB_NAME must be set, or STORAGE_BACKEND set to sqlite or memory")
+        return MongoStorage(
+            os.environ['MONGO_URL'],
+            os.environ['DB_NAME'],
+            read_preference=read_preference(MONGO_READ_PREFERENCE, MONGO_MAX_STALENESS_SECONDS),
+            secondary_collections=CONTENT_COLLECTIONS,
+            primary_window=MONGO_PRIMARY_AFTER_WRITE_SECONDS,
+            **mongo_client_options(),
+        )
+    if STORAGE_BACKEND == 'sqlite':
+        return SQLiteStorage(SQLITE_PATH)
+    if STORAGE_BACKEND == 'memory':
+        return MemoryStorage()
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+storage = create_storage()
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -54,20 +283,77 @@ class CityCreate(BaseModel):
     image_url: Optional[str] = None
     attractions: List[dict] = []
 
+# Most viewed cities and attractions, see POST /api/views
+class PopularCity(BaseModel):
+    id: str
+    name: str
+    image_url: Optional[str] = None
+    views: int
+
+class PopularAttraction(BaseModel):
+    city_id: str
+    city_name: str
+    name: str
+    image_url: Optional[str] = None
+    views: int
+
+class PopularResponse(BaseModel):
+    cities: List[PopularCity]
+    attractions: List[PopularAttraction]
+
+# Numeric bounds for history years: "1221", "1941-1945" and decades like "1950-е"
+YEAR_RANGE_PATTERN = re.compile(r"(\d{1,4})\s*[-–—]\s*(\d{1,4})|(\d{1,4})")
+DECADE_PATTERN = re.compile(r"(\d{2,3}0)-?(?:е|х|ые)(?:\s+годы)?", re.IGNORECASE)
+
+def parse_year_range(year: str) -> Tuple[int, int]:
+    year = year.strip()
+    decade = DECADE_PATTERN.fullmatch(year)
+    if decade:
+        start = int(decade.group(1))
+        return start, start + 9
+    match = YEAR_RANGE_PATTERN.fullmatch(year)
+    if not match:
+        raise ValueError(f"Unrecognized year format: {year!r}")
+    if match.group(3):
+        return int(match.group(3)), int(match.group(3))
+    start, end = int(match.group(1)), int(match.group(2))
+    if end < start:
+        raise ValueError(f"Year range ends before it starts: {year!r}")
+    return start, end
+
 class HistoryEvent(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str
     description: str
     year: str  # Changed to string to support year ranges like "1941-1945"
+    year_start: Optional[int] = None
+    year_end: Optional[int] = None
     image_url: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    @model_validator(mode="before")
+    @classmethod
+    def fill_year_range(cls, data):
+        if isinstance(data, dict) and data.get("year_start") is None and isinstance(data.get("year"), str):
+            try:
+                data = {**data}
+                data["year_start"], data["year_end"] = parse_year_range(data["year"])
+            except ValueError:
+                pass  # Legacy documents keep null bounds and sort first
+        return data
+
 class HistoryEventCreate(BaseModel):
     title: str
     description: str
     year: str
     image_url: Optional[str] = None
 
+    @field_validator("year")
+    @classmethod
+    def validate_year(cls, value: str) -> str:
+        parse_year_range(value)
+        return value.strip()
+
 class CultureItem(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str
@@ -76,12 +362,22 @@ class CultureItem(BaseModel):
     image_url: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+CULTURE_CATEGORIES = ("craft", "tradition", "nature")
+
 class CultureItemCreate(BaseModel):
     title: str
     description: str
     category: str
     image_url: Optional[str] = None
 
+    @field_validator("category")
+    @classmethod
+    def validate_category(cls, value: str) -> str:
+        value = value.strip().lower()
+        if value not in CULTURE_CATEGORIES:
+            raise ValueError(f"category must be one of: {', '.join(CULTURE_CATEGORIES)}")
+        return value
+
 class ContactMessage(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -102,396 +398,2317 @@ def prepare_for_mongo(data):
                 data[key] = value.isoformat()
     return data
 
-# Email sending function
+# Read-through cache for public content collections.
+# Each collection keeps its serialized JSON response together with the content
+# version it was built from; write endpoints bump the version to invalidate it.
+# Concurrent misses on the same list share one load, so only the first
+# request after an invalidation queries the database.
+# A write only invalidates the worker that handled it. While the change feed
+# is down (see watch_content_changes) entries are also revalidated once they
+# are CONTENT_CACHE_TTL_SECONDS old: the expired entry keeps being served while
+# one background load runs. When the reloaded body differs, another worker
+# changed the collection and it is invalidated here too, which also reaches
+# the search index, the view targets and the change feed; an unchanged body
+# keeps the existing entry and its ETag.
+CONTENT_CACHE_TTL_SECONDS = float(os.environ.get('CONTENT_CACHE_TTL_SECONDS', '5'))
+
+def dump_json(content) -> bytes:
+    # content must already be JSON-compatible; output matches FastAPI's JSONResponse
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+def encode_json(content) -> bytes:
+    return dump_json(jsonable_encoder(content))
+
+# Fast read path: documents were written through the *Create models, so they
+# are copied field by field instead of being validated into models again.
+# Anything that does not look like a trusted document takes the model path.
+def response_fields(model) -> Tuple[str, ...]:
+    return tuple(model.model_fields)
+
+def serialize_document(model, document: dict, fields: Optional[Tuple[str, ...]] = None) -> dict:
+    # fields restricts the output to a projection of the model
+    row = {}
+    for name in fields or model.model_fields:
+        field = model.model_fields[name]
+        if name in document:
+            value = document[name]
+        elif field.default_factory is None and not field.is_required():
+            value = field.default
+        elif fields is None:
+            return jsonable_encoder(model(**document))
+        else:
+            value = None
+        if field.annotation is datetime:
+            # prepare_for_mongo stores UTC timestamps as "+00:00"; pydantic emits "Z"
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            if isinstance(value, str) and value.endswith("+00:00"):
+                value = value[:-6] + "Z"
+        row[name] = value
+    return row
+
+def serialize_documents(model, documents: List[dict], fields: Optional[Tuple[str, ...]] = None) -> List[dict]:
+    return [serialize_document(model, document, fields) for document in documents]
+
+# Precompressed variants: each cached body is compressed at most once per
+# encoding, off the event loop, at the highest compression level
+COMPRESSION_MIN_BYTES = 1024
+COMPRESSORS = {"gzip": lambda body: gzip.compress(body, compresslevel=9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=11)
+# Preferred when the client accepts several with the same q-value
+ENCODING_PREFERENCE = ("br", "gzip")
+
+class CachedBody:
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        # Strong validator: any change to the serialized content changes it,
+        # and it is identical across workers serving the same data
+        self.hash = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{self.hash}"'
+        self.loaded_at = time.monotonic()
+        self._variants: Dict[str, asyncio.Task] = {}
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        # Each representation needs its own strong validator
+        return f'"{self.hash}-{encoding}"' if encoding else self.etag
+
+    def etags(self) -> List[str]:
+        return [self.etag] + [self.etag_for(encoding) for encoding in COMPRESSORS]
+
+    async def encoded(self, encoding: str) -> bytes:
+        task = self._variants.get(encoding)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(COMPRESSORS[encoding], self.body))
+            task.add_done_callback(lambda done: self._forget_failed(encoding, done))
+            self._variants[encoding] = task
+        # Shared by concurrent requests: one of them going away must not cancel it
+        return await asyncio.shield(task)
+
+    def _forget_failed(self, encoding: str, task: asyncio.Task):
+        # The next request compresses again instead of getting the same error
+        if (task.cancelled() or task.exception() is not None) and self._variants.get(encoding) is task:
+            del self._variants[encoding]
+
+class ContentCache:
+    # Filtered views (e.g. a history era) are cached as variants of their
+    # collection; at most this many are kept per collection, least recently
+    # used first out. The unfiltered list (variant None) is never evicted.
+    MAX_VARIANTS = 64
+
+    def __init__(self, collections):
+        self._versions = {name: 0 for name in collections}
+        self._entries = {name: OrderedDict() for name in collections}
+        # Running load per variant, with the version it loads
+        self._loads = {name: {} for name in collections}
+        self._listeners = []
+        # Set while the change feed delivers other workers' writes
+        self.change_feed = False
+        self._checked_after = -math.inf
+
+    def version(self, collection: str) -> int:
+        return self._versions[collection]
+
+    def add_listener(self, listener):
+        # Called with the names of the invalidated collections
+        self._listeners.append(listener)
+
+    def invalidate(self, *collections: str):
+        names = collections or tuple(self._versions)
+        for name in names:
+            self._versions[name] += 1
+            self._entries[name].clear()
+            self._loads[name].clear()
+        for listener in self._listeners:
+            listener(names)
+
+    def expire(self):
+        # Revalidates every entry on its next use, e.g. after changes may
+        # have been missed; only collections whose content differs are invalidated
+        self._checked_after = time.monotonic()
+
+    def _expired(self, entry: CachedBody) -> bool:
+        if entry.loaded_at <= self._checked_after:
+            return True
+        return not self.change_feed and time.monotonic() - entry.loaded_at >= CONTENT_CACHE_TTL_SECONDS
+
+    async def get(self, collection: str, loader, variant=None) -> CachedBody:
+        entries = self._entries[collection]
+        entry = entries.get(variant)
+        if entry is not None and entry.version == self._versions[collection]:
+            entries.move_to_end(variant)
+            if self._expired(entry):
+                CONTENT_CACHE_REQUESTS.labels(collection, "expired").inc()
+                self._load(collection, loader, variant, entry)
+            else:
+                CONTENT_CACHE_REQUESTS.labels(collection, "hit").inc()
+            return entry
+        load = self._loads[collection].get(variant)
+        if load is not None and load[0] == self._versions[collection]:
+            CONTENT_CACHE_REQUESTS.labels(collection, "coalesced").inc()
+            task = load[1]
+        else:
+            CONTENT_CACHE_REQUESTS.labels(collection, "miss").inc()
+            task = self._load(collection, loader, variant)
+        # Shared by concurrent requests: one of them going away must not cancel it
+        return await asyncio.shield(task)
+
+    def _load(self, collection: str, loader, variant, previous: Optional[CachedBody] = None) -> asyncio.Task:
+        version = self._versions[collection]
+        loads = self._loads[collection]
+        if variant in loads and loads[variant][0] == version:
+            return loads[variant][1]
+        task = asyncio.ensure_future(self._reload(collection, loader, variant, version, previous))
+        loads[variant] = (version, task)
+
+        def done(task: asyncio.Task):
+            if loads.get(variant, (None, None))[1] is task:
+                del loads[variant]
+            error = None if task.cancelled() else task.exception()
+            if error is not None and previous is not None:
+                # Nobody awaits a background revalidation; the stale entry stays
+                logger.warning(f"Revalidating cached {collection} failed: {error}")
+
+        task.add_done_callback(done)
+        return task
+
+    async def _reload(self, collection: str, loader, variant, version: int, previous: Optional[CachedBody]) -> CachedBody:
+        entry = CachedBody(version, dump_json(await loader()))
+        # Only keep the result if no write happened while loading
+        if version != self._versions[collection]:
+            return entry
+        if previous is not None and previous.hash == entry.hash:
+            previous.loaded_at = entry.loaded_at
+            return previous
+        if previous is not None:
+            # Changed by another worker since it was cached
+            self.invalidate(collection)
+            entry.version = self._versions[collection]
+        entries = self._entries[collection]
+        if variant not in entries and len(entries) >= self.MAX_VARIANTS:
+            entries.pop(next(key for key in entries if key is not None))
+        entries[variant] = entry
+        entries.move_to_end(variant)
+        return entry
+
+content_cache = ContentCache(CONTENT_COLLECTIONS)
+
+# HTTP caching for the public list endpoints
+CONTENT_MAX_AGE = int(os.environ.get('CONTENT_MAX_AGE', '60'))
+CONTENT_STALE_WHILE_REVALIDATE = int(os.environ.get('CONTENT_STALE_WHILE_REVALIDATE', '300'))
+
+def content_cache_control() -> str:
+    return os.environ.get('CONTENT_CACHE_CONTROL') or (
+        f"public, max-age={CONTENT_MAX_AGE}, "
+        f"stale-while-revalidate={CONTENT_STALE_WHILE_REVALIDATE}"
+    )
+
+def etag_matches(if_none_match: Optional[str], etags: List[str]) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        # If-None-Match uses weak comparison, so W/"x" matches "x"
+        if candidate == '*' or candidate.removeprefix('W/') in etags:
+            return True
+    return False
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in COMPRESSORS:
+            continue
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+async def cached_json_response(request: Request, entry: CachedBody) -> Response:
+    encoding = None
+    if len(entry.body) >= COMPRESSION_MIN_BYTES:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": entry.etag_for(encoding),
+        "Cache-Control": content_cache_control(),
+        "Vary": "Accept-Encoding",
+    }
+    # The content is the same in every encoding, so any of its validators match
+    if etag_matches(request.headers.get("if-none-match"), entry.etags()):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=await entry.encoded(encoding), media_type="application/json", headers=headers)
+
+# Opt-in streaming of list endpoints straight from the storage cursor, so
+# memory stays flat regardless of collection size. Requested with
+# ?stream=true (JSON array) or Accept: application/x-ndjson (NDJSON).
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 500
+STREAM_CHUNK_BYTES = 64 * 1024
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def streaming_requested(request: Request, stream: bool) -> bool:
+    return stream or wants_ndjson(request)
+
+def stream_documents(request: Request, cursor, model, fields: Optional[Tuple[str, ...]] = None) -> StreamingResponse:
+    ndjson = wants_ndjson(request)
+
+    async def generate():
+        # Group small documents into larger writes
+        chunk = bytearray(b"" if ndjson else b"[")
+        first = True
+        async for document in cursor:
+            if ndjson:
+                chunk += dump_json(serialize_document(model, document, fields)) + b"\n"
+            else:
+                if not first:
+                    chunk += b","
+                chunk += dump_json(serialize_document(model, document, fields))
+            first = False
+            if len(chunk) >= STREAM_CHUNK_BYTES:
+                yield bytes(chunk)
+                chunk.clear()
+        if not ndjson:
+            chunk += b"]"
+        if chunk:
+            yield bytes(chunk)
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE if ndjson else "application/json")
+
+# Email notifications for contact form submissions. Without SMTP_HOST the
+# message is only logged. For local testing point SMTP_HOST/SMTP_PORT at a
+# stand-in such as `python -m aiosmtpd -n -l localhost:1025`, with
+# SMTP_STARTTLS=false since the stand-in does not offer STARTTLS.
+SMTP_HOST = os.environ.get('SMTP_HOST')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
+SMTP_USER = os.environ.get('SMTP_USER')
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'true').lower() == 'true'
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', '10'))
+EMAIL_FROM = os.environ.get('EMAIL_FROM', SMTP_USER or 'noreply@localhost')
+CONTACT_NOTIFY_EMAIL = os.environ.get('CONTACT_NOTIFY_EMAIL', 'adk700@yandex.ru')
+
+def build_notification(contact_data: ContactMessage) -> MIMEMultipart:
+    mime = MIMEMultipart()
+    mime['From'] = EMAIL_FROM
+    mime['To'] = CONTACT_NOTIFY_EMAIL
+    mime['Reply-To'] = contact_data.email
+    mime['Subject'] = f"Сообщение с сайта от {contact_data.name}"
+    body = f"Имя: {contact_data.name}\nEmail: {contact_data.email}\n\n{contact_data.message}"
+    mime.attach(MIMEText(body, 'plain', 'utf-8'))
+    return mime
+
+def deliver_email(mime: MIMEMultipart):
+    # Blocking; always run in a worker thread
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as smtp:
+        if SMTP_STARTTLS:
+            smtp.starttls()
+        if SMTP_USER:
+            smtp.login(SMTP_USER, SMTP_PASSWORD or '')
+        smtp.send_message(mime)
+
+# Email sending function; raises on failure so the caller can retry
 async def send_email_notification(contact_data: ContactMessage):
-    try:
-        # This would be configured with actual email settings
-        # For now, just log the message
+    if not SMTP_HOST:
         logging.info(f"Contact form submitted: {contact_data.name} ({contact_data.email}): {contact_data.message}")
-    except Exception as e:
-        logging.error(f"Failed to send email notification: {e}")
+        return
+    await asyncio.to_thread(deliver_email, build_notification(contact_data))
 
 # Cities endpoints
+# Fields needed by the landing page and the city list
+CITY_SUMMARY_FIELDS = ("id", "name", "description", "image_url")
+
+def city_fields(fields: Optional[str], view: Optional[str]) -> Optional[Tuple[str, ...]]:
+    if view is not None and view not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail=f"Unknown view: {view}")
+    if fields:
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = requested - set(City.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        # id is always returned; keep model order so each projection has one cache key
+        return tuple(name for name in City.model_fields if name in requested or name == "id")
+    if view == "summary":
+        return CITY_SUMMARY_FIELDS
+    return None
+
+async def load_cities(fields: Optional[Tuple[str, ...]] = None):
+    cities = await storage.cities.find(fields=fields or response_fields(City))
+    return serialize_documents(City, cities, fields)
+
+async def load_city(city_id: str):
+    city = await storage.cities.find_one({"id": city_id}, response_fields(City))
+    if city is None:
+        raise HTTPException(status_code=404, detail="City not found")
+    return serialize_document(City, city)
+
 @api_router.get("/cities", response_model=List[City])
-async def get_cities():
-    cities = await db.cities.find().to_list(length=None)
-    return [City(**city) for city in cities]
+async def get_cities(
+    request: Request,
+    fields: Optional[str] = None,
+    view: Optional[str] = None,
+    stream: bool = False,
+):
+    selected = city_fields(fields, view)
+    if streaming_requested(request, stream):
+        cursor = storage.cities.iterate(fields=selected or response_fields(City), batch_size=STREAM_BATCH_SIZE)
+        return stream_documents(request, cursor, City, selected)
+    return await cached_json_response(request, await content_cache.get("cities", lambda: load_cities(selected), selected))
+
+# Registered before /cities/{city_id} so "popular" is not taken for an id
+@api_router.get("/cities/popular", response_model=PopularResponse)
+async def get_popular(request: Request):
+    return await cached_json_response(request, await popular_ranking.get())
+
+@api_router.get("/cities/{city_id}", response_model=City)
+async def get_city(request: Request, city_id: str):
+    return await cached_json_response(request, await content_cache.get("cities", lambda: load_city(city_id), ("id", city_id)))
 
 @api_router.post("/cities", response_model=City)
 async def create_city(city_data: CityCreate, admin: str = Depends(verify_admin)):
     city = City(**city_data.dict())
     city_dict = prepare_for_mongo(city.dict())
-    await db.cities.insert_one(city_dict)
+    await storage.cities.insert_one(city_dict)
+    content_cache.invalidate("cities")
+    search_index.add("cities", city_dict)
     return city
 
 # History endpoints
+HISTORY_SORT = [("year_start", 1), ("year_end", 1)]
+
+def history_query(year_from: Optional[int], year_to: Optional[int], century: Optional[int]) -> dict:
+    # A century n covers the years (n - 1) * 100 + 1 .. n * 100
+    if century is not None:
+        century_from, century_to = (century - 1) * 100 + 1, century * 100
+        year_from = century_from if year_from is None else max(year_from, century_from)
+        year_to = century_to if year_to is None else min(year_to, century_to)
+    # Events overlapping [year_from, year_to]
+    query = {}
+    if year_to is not None:
+        query["year_start"] = {"$lte": year_to}
+    if year_from is not None:
+        query["year_end"] = {"$gte": year_from}
+    return query
+
+async def load_history(query: Optional[dict] = None):
+    events = await storage.history_events.find(query, response_fields(HistoryEvent), sort=HISTORY_SORT)
+    return serialize_documents(HistoryEvent, events)
+
 @api_router.get("/history", response_model=List[HistoryEvent])
-async def get_history():
-    events = await db.history_events.find().to_list(length=None)
-    # Sort by year, handling string years
-    def sort_key(event):
-        year_str = event.get('year', '0')
-        # Extract first year from ranges like "1941-1945"
-        first_year = year_str.split('-')[0]
-        try:
-            return int(first_year)
-        except ValueError:
-            return 0
-    
-    sorted_events = sorted(events, key=sort_key)
-    return [HistoryEvent(**event) for event in sorted_events]
+async def get_history(
+    request: Request,
+    year_from: Optional[int] = Query(None, alias="from"),
+    year_to: Optional[int] = Query(None, alias="to"),
+    century: Optional[int] = Query(None, ge=1, le=21),
+    stream: bool = False,
+):
+    query = history_query(year_from, year_to, century)
+    if streaming_requested(request, stream):
+        cursor = storage.history_events.iterate(query, response_fields(HistoryEvent), sort=HISTORY_SORT, batch_size=STREAM_BATCH_SIZE)
+        return stream_documents(request, cursor, HistoryEvent)
+    variant = (year_from, year_to, century) if query else None
+    return await cached_json_response(
+        request,
+        await content_cache.get("history_events", lambda: load_history(query), variant),
+    )
 
 @api_router.post("/history", response_model=HistoryEvent)
 async def create_history_event(event_data: HistoryEventCreate, admin: str = Depends(verify_admin)):
     event = HistoryEvent(**event_data.dict())
     event_dict = prepare_for_mongo(event.dict())
-    await db.history_events.insert_one(event_dict)
+    await storage.history_events.insert_one(event_dict)
+    content_cache.invalidate("history_events")
+    search_index.add("history_events", event_dict)
     return event
 
 # Culture endpoints
+async def load_culture(query: Optional[dict] = None):
+    items = await storage.culture_items.find(query, response_fields(CultureItem))
+    return serialize_documents(CultureItem, items)
+
+async def load_culture_facets():
+    # Counts per category in one aggregation; known categories are always listed
+    counts = {category: 0 for category in CULTURE_CATEGORIES}
+    counts.update(await storage.culture_items.count_by("category"))
+    return {"total": sum(counts.values()), "categories": counts}
+
+def culture_query(category: Optional[str]) -> dict:
+    if category is None:
+        return {}
+    if category not in CULTURE_CATEGORIES:
+        raise HTTPException(status_code=400, detail=f"Unknown category: {category}")
+    return {"category": category}
+
 @api_router.get("/culture", response_model=List[CultureItem])
-async def get_culture():
-    items = await db.culture_items.find().to_list(length=None)
-    return [CultureItem(**item) for item in items]
+async def get_culture(request: Request, category: Optional[str] = None, stream: bool = False):
+    query = culture_query(category)
+    if streaming_requested(request, stream):
+        return stream_documents(request, storage.culture_items.iterate(query, response_fields(CultureItem), batch_size=STREAM_BATCH_SIZE), CultureItem)
+    return await cached_json_response(
+        request,
+        await content_cache.get("culture_items", lambda: load_culture(query), ("category", category) if category else None),
+    )
+
+@api_router.get("/culture/facets")
+async def get_culture_facets(request: Request):
+    return await cached_json_response(request, await content_cache.get("culture_items", load_culture_facets, "facets"))
 
 @api_router.post("/culture", response_model=CultureItem)
 async def create_culture_item(item_data: CultureItemCreate, admin: str = Depends(verify_admin)):
     item = CultureItem(**item_data.dict())
     item_dict = prepare_for_mongo(item.dict())
-    await db.culture_items.insert_one(item_dict)
+    await storage.culture_items.insert_one(item_dict)
+    content_cache.invalidate("culture_items")
+    search_index.add("culture_items", item_dict)
     return item
 
+# Bundle endpoint: all public content in one response for a cold page load.
+# The body is spliced together from the per-collection cache entries, so
+# nothing is queried or encoded twice; the combined entry is rebuilt only
+# when one of its parts changes.
+class BundleResponse(BaseModel):
+    cities: List[City]
+    history: List[HistoryEvent]
+    culture: List[CultureItem]
+
+_bundle_entry: Optional[CachedBody] = None
+_bundle_parts: Optional[tuple] = None
+
+async def load_bundle() -> CachedBody:
+    global _bundle_entry, _bundle_parts
+    cities, history, culture = await asyncio.gather(
+        content_cache.get("cities", load_cities),
+        content_cache.get("history_events", load_history),
+        content_cache.get("culture_items", load_culture),
+    )
+    parts = (cities, history, culture)
+    if _bundle_parts is None or any(new is not old for new, old in zip(parts, _bundle_parts)):
+        body = b'{"cities":' + cities.body + b',"history":' + history.body + b',"culture":' + culture.body + b'}'
+        _bundle_entry = CachedBody(max(part.version for part in parts), body)
+        _bundle_parts = parts
+    return _bundle_entry
+
+@api_router.get("/bundle", response_model=BundleResponse)
+async def get_bundle(request: Request):
+    return await cached_json_response(request, await load_bundle())
+
+# Change feed: GET /api/events is a Server-Sent Events stream naming each
+# content collection that changed, so browsers and edge caches refetch only
+# that. Cache invalidations are coalesced for EVENTS_COALESCE_SECONDS and
+# fanned out to every subscriber of this worker. With MongoDB change streams
+# (replica sets only) each worker also sees the other workers' writes,
+# invalidates its own cache and forwards them.
+# Event ids are built from the hashes of the full lists, which are the same
+# on every worker serving the same content. A client reconnecting with
+# Last-Event-ID, to any worker, is only told about the lists that differ.
+EVENTS_COALESCE_SECONDS = float(os.environ.get('EVENTS_COALESCE_SECONDS', '0.1'))
+EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', '15'))
+# Streams end after this long and the client reconnects with Last-Event-ID,
+# which spreads clients over workers and lets a draining worker exit
+EVENTS_MAX_STREAM_SECONDS = float(os.environ.get('EVENTS_MAX_STREAM_SECONDS', '300'))
+EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('EVENTS_MAX_SUBSCRIBERS', '1000'))
+EVENTS_RETRY_MS = 3000
+EVENTS_SUBSCRIBER_QUEUE = 64
+EVENTS_CHANGE_STREAMS = os.environ.get('EVENTS_CHANGE_STREAMS', 'true').lower() == 'true'
+# A change feed failing this many times in a row without opening is given up
+EVENTS_CHANGE_STREAM_ATTEMPTS = 5
+# API resource affected by each collection, and the full list it serves
+CONTENT_RESOURCES = {"cities": "cities", "history_events": "history", "culture_items": "culture"}
+CONTENT_LOADERS = {"cities": load_cities, "history_events": load_history, "culture_items": load_culture}
+CONTENT_HASH_LENGTH = 16
+
+async def content_state() -> Dict[str, str]:
+    # Hash of each resource's full list, by resource
+    entries = await asyncio.gather(*(content_cache.get(name, loader) for name, loader in CONTENT_LOADERS.items()))
+    return {CONTENT_RESOURCES[name]: entry.hash[:CONTENT_HASH_LENGTH] for name, entry in zip(CONTENT_LOADERS, entries)}
+
+def content_event_id(state: Dict[str, str]) -> str:
+    return "-".join(state[resource] for resource in CONTENT_RESOURCES.values())
+
+def parse_content_event_id(event_id: Optional[str]) -> Optional[Dict[str, str]]:
+    hashes = (event_id or "").split("-")
+    if len(hashes) != len(CONTENT_RESOURCES) or any(len(part) != CONTENT_HASH_LENGTH for part in hashes):
+        return None
+    return dict(zip(CONTENT_RESOURCES.values(), hashes))
+
+def content_changes(known: Dict[str, str], state: Dict[str, str]) -> List[dict]:
+    event_id = content_event_id(state)
+    return [
+        {"id": event_id, "collection": collection, "resource": resource}
+        for collection, resource in CONTENT_RESOURCES.items()
+        if known.get(resource) != state[resource]
+    ]
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers = set()
+        self._flush_handle = None
+        self._publish_lock = asyncio.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def notify(self, collections):
+        # Which collections changed is worked out from the content state
+        if self._flush_handle is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:  # No server running, so nobody is listening
+                return
+            self._flush_handle = loop.call_later(EVENTS_COALESCE_SECONDS, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        if self._subscribers:
+            asyncio.ensure_future(self._publish())
+
+    async def _publish(self):
+        # One at a time, so subscribers never get an older state after a newer one
+        async with self._publish_lock:
+            try:
+                state = await content_state()
+            except Exception as e:
+                # Subscribers catch up on their next reconnect
+                logger.warning(f"Could not publish content changes: {e}")
+                return
+            for queue in list(self._subscribers):
+                try:
+                    queue.put_nowait(state)
+                except asyncio.QueueFull:
+                    # A stalled client is dropped and resumes from Last-Event-ID
+                    self._disconnect(queue)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=EVENTS_SUBSCRIBER_QUEUE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _disconnect(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def close(self):
+        for queue in list(self._subscribers):
+            self._disconnect(queue)
+
+event_broker = EventBroker()
+content_cache.add_listener(event_broker.notify)
+
+def format_sse(event: str, event_id: str, data: dict) -> bytes:
+    return f"id: {event_id}\nevent: {event}\ndata: ".encode("utf-8") + dump_json(data) + b"\n\n"
+
+@api_router.get("/events")
+async def content_events(request: Request, last_event_id: Optional[str] = None):
+    if event_broker.subscribers >= EVENTS_MAX_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many event subscribers", headers={"Retry-After": "30"})
+    # EventSource sends Last-Event-ID on reconnect; the query parameter is for
+    # clients that cannot set headers
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+    known = parse_content_event_id(last_event_id)
+    # Subscribed first, so no change between the two is missed
+    queue = event_broker.subscribe()
+    try:
+        state = await content_state()
+    except Exception:
+        event_broker.unsubscribe(queue)
+        raise
+
+    async def generate():
+        current = state
+        deadline = time.monotonic() + EVENTS_MAX_STREAM_SECONDS
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n".encode("utf-8")
+            if known is None:
+                # "ready" starts a fresh stream; "reset" answers an id that is
+                # not understood and means everything should be refetched
+                kind = "reset" if last_event_id else "ready"
+                yield format_sse(kind, content_event_id(current), {"resources": list(CONTENT_RESOURCES.values())})
+            else:
+                for event in content_changes(known, current):
+                    yield format_sse("change", event["id"], event)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    latest = await asyncio.wait_for(queue.get(), min(EVENTS_HEARTBEAT_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if latest is None:
+                    break
+                for event in content_changes(current, latest):
+                    yield format_sse("change", event["id"], event)
+                current = latest
+        finally:
+            event_broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def watch_content_changes():
+    # Other workers' writes arrive through the storage change feed
+    delay = 1.0
+    failures = 0
+    while True:
+        try:
+            async for collection in storage.watch(CONTENT_COLLECTIONS):
+                if collection is None:
+                    # Other workers' writes now arrive here, no need to poll.
+                    # Changes made before the feed opened are found by
+                    # revalidating, which only invalidates what differs.
+                    content_cache.change_feed = True
+                    content_cache.expire()
+                    delay = 1.0
+                    failures = 0
+                    continue
+                storage[collection].pin_primary()
+                content_cache.invalidate(collection)
+        except WatchUnsupported as e:
+            logger.info(f"No change feed, content events cover this worker's writes only: {e}")
+            return
+        except Exception as e:
+            failures += 1
+            if failures >= EVENTS_CHANGE_STREAM_ATTEMPTS:
+                # E.g. missing privileges: expiring cached content takes over
+                logger.warning(f"Change feed failed {failures} times, content events cover this worker's writes only: {e}")
+                return
+            logger.warning(f"Change feed failed, restarting in {delay:.0f}s: {e}")
+        finally:
+            content_cache.change_feed = False
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60)
+
+# Full-text search over cities (with their attractions), history and culture.
+# The inverted index lives in process memory. create_* endpoints add their
+# document incrementally; any other write bumps the content version and the
+# affected collection is reloaded on the next query.
+SEARCH_WORD_PATTERN = re.compile(r"[0-9a-zа-яё]+")
+SEARCH_STOPWORDS = frozenset(
+    "и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по "
+    "только ее её мне было вот от меня еще ещё нет о из ему для при это или их где".split()
+)
+# Longest suffixes first; a deliberately small subset of the Snowball rules
+RUSSIAN_SUFFIXES = sorted(
+    (
+        "ость ости ский ская ское ские ского ской ских ским ться ется ются "
+        "ыми ими ого его ому ему ать ять ить еть ая яя ое ее ие ые ой ей ий ый ом ем "
+        "ам ям ах ях ов ев ию ью ия ья ии а я о е у ю ы и ь й"
+    ).split(),
+    key=len,
+    reverse=True,
+)
+SEARCH_TITLE_WEIGHT = 3.0
+SEARCH_SNIPPET_CHARS = 160
+SEARCH_MIN_PREFIX = 3
+
+def stem_word(word: str) -> str:
+    if not re.search("[а-я]", word):
+        return word
+    for suffix in RUSSIAN_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[:-len(suffix)]
+    return word
+
+def search_terms(text: str) -> List[Tuple[str, int, int]]:
+    # (stem, start, end) for every indexable word in text
+    terms = []
+    for match in SEARCH_WORD_PATTERN.finditer(text.casefold()):
+        word = match.group().replace("ё", "е")
+        if word in SEARCH_STOPWORDS:
+            continue
+        terms.append((stem_word(word), match.start(), match.end()))
+    return terms
+
+class SearchIndex:
+    def __init__(self):
+        self._postings: Dict[str, Dict[tuple, float]] = {}
+        self._vocabulary: List[str] = []
+        self._documents: Dict[tuple, dict] = {}
+        self._keys = {name: set() for name in CONTENT_COLLECTIONS}
+        self._versions = {name: None for name in CONTENT_COLLECTIONS}
+        self._lock = asyncio.Lock()
+
+    def _entries(self, collection: str, document: dict) -> List[dict]:
+        if collection == "cities":
+            entries = [{"type": "city", "id": document["id"], "title": document["name"], "text": document.get("description", "")}]
+            for index, attraction in enumerate(document.get("attractions") or []):
+                entries.append({
+                    "type": "attraction",
+                    "id": f"{document['id']}:{index}",
+                    "city_id": document["id"],
+                    "city": document["name"],
+                    "title": attraction.get("name", ""),
+                    "text": attraction.get("description", ""),
+                })
+            return entries
+        if collection == "history_events":
+            return [{"type": "history", "id": document["id"], "title": document["title"], "text": document.get("description", ""), "year": document.get("year")}]
+        return [{"type": "culture", "id": document["id"], "title": document["title"], "text": document.get("description", ""), "category": document.get("category")}]
+
+    def _add(self, collection: str, document: dict):
+        for entry in self._entries(collection, document):
+            key = (entry["type"], entry["id"])
+            self._remove(key)
+            weights = {}
+            for term, _, _ in search_terms(f"{entry['title']} {entry.get('year') or ''}"):
+                weights[term] = weights.get(term, 0.0) + SEARCH_TITLE_WEIGHT
+            body = search_terms(entry["text"])
+            for term, _, _ in body:
+                weights[term] = weights.get(term, 0.0) + 1.0
+            # Damp long descriptions so they do not win on length alone
+            norm = 1.0 / math.sqrt(1 + len(body))
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._vocabulary, term)
+                postings[key] = weight * norm
+            entry["terms"] = tuple(weights)
+            self._documents[key] = entry
+            self._keys[collection].add(key)
+
+    def _remove(self, key: tuple):
+        entry = self._documents.pop(key, None)
+        if entry is None:
+            return
+        for term in entry["terms"]:
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+    def add(self, collection: str, document: dict):
+        # Incremental update after a single insert. If other writes are still
+        # pending for the collection it will be reloaded on the next query anyway.
+        if self._versions[collection] == content_cache.version(collection) - 1:
+            self._add(collection, document)
+            self._versions[collection] = content_cache.version(collection)
+
+    async def ensure_current(self):
+        stale = [name for name in CONTENT_COLLECTIONS if self._versions[name] != content_cache.version(name)]
+        if not stale:
+            return
+        async with self._lock:
+            for collection in stale:
+                version = content_cache.version(collection)
+                if self._versions[collection] == version:
+                    continue
+                documents = await storage[collection].find()
+                for key in list(self._keys[collection]):
+                    self._remove(key)
+                self._keys[collection].clear()
+                for document in documents:
+                    self._add(collection, document)
+                self._versions[collection] = version
+
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [term] if term in self._postings else []
+        start = bisect.bisect_left(self._vocabulary, term)
+        end = bisect.bisect_left(self._vocabulary, term + "\uffff")
+        return self._vocabulary[start:end]
+
+    def search(self, query: str, limit: int = 10, types: Optional[set] = None) -> Tuple[int, List[dict]]:
+        terms = [term for term, _, _ in search_terms(query)]
+        if not terms:
+            return 0, []
+        unique_terms = list(dict.fromkeys(terms))
+        # The last word may still be being typed, so it also matches as a
+        # prefix unless the query ends with a space
+        typing = query == query.rstrip()
+        total = len(self._documents) or 1
+        scores: Dict[tuple, float] = {}
+        matched: Dict[tuple, int] = {}
+        for term in unique_terms:
+            seen = set()
+            prefix = typing and term == terms[-1] and len(term) >= SEARCH_MIN_PREFIX
+            for variant in self._expand(term, prefix):
+                postings = self._postings[variant]
+                # Prefix completions count for less than the exact word
+                idf = math.log(1 + total / len(postings)) * (1.0 if variant == term else 0.5)
+                for key, weight in postings.items():
+                    if types and key[0] not in types:
+                        continue
+                    scores[key] = scores.get(key, 0.0) + weight * idf
+                    if key not in seen:
+                        seen.add(key)
+                        matched[key] = matched.get(key, 0) + 1
+        # Documents matching more of the query words rank first
+        ranked = sorted(scores, key=lambda key: (matched[key], scores[key]), reverse=True)
+        results = []
+        for key in ranked[:limit]:
+            entry = self._documents[key]
+            result = {name: value for name, value in entry.items() if name not in ("text", "terms")}
+            result["score"] = round(scores[key] * matched[key] / len(unique_terms), 4)
+            result["snippet"] = self._snippet(entry["text"], set(terms))
+            results.append(result)
+        return len(scores), results
+
+    def _snippet(self, text: str, terms: set) -> str:
+        positions = [start for term, start, _ in search_terms(text) if any(term.startswith(t) for t in terms)]
+        if len(text) <= SEARCH_SNIPPET_CHARS:
+            return text
+        start = max(0, (positions[0] if positions else 0) - SEARCH_SNIPPET_CHARS // 4)
+        # Snap to word boundaries
+        if start:
+            space = text.find(" ", start)
+            start = space + 1 if 0 <= space < start + 20 else start
+        end = min(len(text), start + SEARCH_SNIPPET_CHARS)
+        if end < len(text):
+            space = text.rfind(" ", start, end)
+            end = space if space > start else end
+        return ("…" if start else "") + text[start:end] + ("…" if end < len(text) else "")
+
+search_index = SearchIndex()
+
+SEARCH_TYPES = ("city", "attraction", "history", "culture")
+
+@api_router.get("/search")
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    type: Optional[str] = None,
+):
+    types = None
+    if type:
+        types = {value.strip() for value in type.split(",") if value.strip()}
+        unknown = types - set(SEARCH_TYPES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}")
+    # Revalidates the cached lists, so changes made by other workers reach the index
+    await load_bundle()
+    await search_index.ensure_current()
+    total, results = search_index.search(q, limit, types)
+    return {"query": q, "total": total, "results": results}
+
+# Contact form pipeline: submissions are queued and written to MongoDB in
+# batches by a background task, then handed to email workers that retry with
+# exponential backoff and park undeliverable notifications in a dead-letter
+# collection. A submission has already been answered with 200, so a failing
+# write is retried until it succeeds (the full queue sheds new submissions
+# meanwhile). Whatever is still unwritten at shutdown is saved to an NDJSON
+# file under CONTACT_SPOOL_DIR, which the next start writes to the database.
+# Writes replace by id, so a batch written twice is stored once.
+CONTACT_QUEUE_SIZE = int(os.environ.get('CONTACT_QUEUE_SIZE', '1000'))
+CONTACT_BATCH_SIZE = int(os.environ.get('CONTACT_BATCH_SIZE', '100'))
+CONTACT_BATCH_INTERVAL = float(os.environ.get('CONTACT_BATCH_INTERVAL', '0.2'))
+CONTACT_WRITE_BACKOFF_SECONDS = 0.5
+CONTACT_WRITE_BACKOFF_MAX_SECONDS = 30
+CONTACT_SPOOL_DIR = Path(os.environ.get('CONTACT_SPOOL_DIR', str(ROOT_DIR / 'spool' / 'contact_messages')))
+EMAIL_WORKERS = int(os.environ.get('EMAIL_WORKERS', '2'))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', '5'))
+EMAIL_BACKOFF_SECONDS = float(os.environ.get('EMAIL_BACKOFF_SECONDS', '2'))
+EMAIL_BACKOFF_MAX_SECONDS = float(os.environ.get('EMAIL_BACKOFF_MAX_SECONDS', '300'))
+PIPELINE_DRAIN_SECONDS = 10
+
+def spool_contact_messages(documents: List[dict]) -> Path:
+    CONTACT_SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+    path = CONTACT_SPOOL_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%fZ}-{os.getpid()}.ndjson"
+    temporary = path.with_name(f".{path.name}.tmp")
+    with open(temporary, "wb") as spool:
+        for document in documents:
+            spool.write(dump_json(document) + b"\n")
+        spool.flush()
+        os.fsync(spool.fileno())
+    os.replace(temporary, path)
+    return path
+
+def claim_spooled_contact_messages() -> List[Tuple[Path, List[dict]]]:
+    # Renaming claims a file, so only one worker replays it. A file left
+    # *.claimed by a crash can be renamed back to *.ndjson to replay it.
+    claimed = []
+    if not CONTACT_SPOOL_DIR.is_dir():
+        return claimed
+    for path in sorted(CONTACT_SPOOL_DIR.glob("*.ndjson")):
+        target = path.with_name(f"{path.name}.{os.getpid()}.claimed")
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            continue
+        with open(target, encoding="utf-8") as spool:
+            claimed.append((target, [json.loads(line) for line in spool if line.strip()]))
+    return claimed
+
+class ContactPipeline:
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._email_queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._writer: Optional[asyncio.Task] = None
+        # Taken from the queue but not stored yet
+        self._unwritten: List[ContactMessage] = []
+        # Spool file being replayed
+        self._replaying: Optional[Path] = None
+        # Emails waiting out their backoff, with the attempt they will make
+        self._retries: Dict[asyncio.Task, Tuple[ContactMessage, int]] = {}
+        # Moving average of write latency, in seconds
+        self.write_latency = 0.0
+        self.write_latency_at = 0.0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def _record_latency(self, seconds: float):
+        self.write_latency = seconds if not self.write_latency_at else 0.8 * self.write_latency + 0.2 * seconds
+        self.write_latency_at = time.monotonic()
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=CONTACT_QUEUE_SIZE)
+        self._email_queue = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop())
+        self._tasks = [self._writer, asyncio.create_task(self._replay_spool())]
+        self._tasks += [asyncio.create_task(self._email_loop()) for _ in range(EMAIL_WORKERS)]
+
+    def submit(self, message: ContactMessage) -> bool:
+        self.start()
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _next_batch(self) -> List[ContactMessage]:
+        batch = self._unwritten
+        batch.append(await self._queue.get())
+        deadline = asyncio.get_running_loop().time() + CONTACT_BATCH_INTERVAL
+        while len(batch) < CONTACT_BATCH_SIZE:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write_loop(self):
+        while True:
+            batch = await self._next_batch()
+            await self._write(batch)
+            self._unwritten = []
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _write(self, batch: List[ContactMessage]):
+        documents = [prepare_for_mongo(message.dict()) for message in batch]
+        attempt = 1
+        while True:
+            started = time.monotonic()
+            try:
+                await storage.contact_messages.replace_many(documents)
+                self._record_latency(time.monotonic() - started)
+                break
+            except Exception as e:
+                self._record_latency(time.monotonic() - started)
+                delay = min(CONTACT_WRITE_BACKOFF_SECONDS * 2 ** (attempt - 1), CONTACT_WRITE_BACKOFF_MAX_SECONDS)
+                logger.warning(f"Failed to store {len(batch)} contact messages (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                attempt += 1
+        for message in batch:
+            self._email_queue.put_nowait((message, 1))
+
+    async def _replay_spool(self):
+        for path, documents in await asyncio.to_thread(claim_spooled_contact_messages):
+            self._replaying = path
+            for start in range(0, len(documents), CONTACT_BATCH_SIZE):
+                await self._write([ContactMessage(**document) for document in documents[start:start + CONTACT_BATCH_SIZE]])
+            path.unlink()
+            self._replaying = None
+            logger.info(f"Stored {len(documents)} contact messages saved at the last shutdown")
+
+    async def _email_loop(self):
+        while True:
+            message, attempt = await self._email_queue.get()
+            try:
+                await send_email_notification(message)
+            except Exception as e:
+                if attempt >= EMAIL_MAX_ATTEMPTS:
+                    await self._dead_letter(message, attempt, e)
+                else:
+                    delay = min(EMAIL_BACKOFF_SECONDS * 2 ** (attempt - 1), EMAIL_BACKOFF_MAX_SECONDS)
+                    logger.warning(f"Email for contact message {message.id} failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                    self._schedule_retry(message, attempt + 1, delay)
+            finally:
+                self._email_queue.task_done()
+
+    def _schedule_retry(self, message: ContactMessage, attempt: int, delay: float):
+        async def retry():
+            await asyncio.sleep(delay)
+            self._email_queue.put_nowait((message, attempt))
+        task = asyncio.create_task(retry())
+        self._retries[task] = (message, attempt)
+        task.add_done_callback(lambda done: self._retries.pop(done, None))
+
+    async def _dead_letter(self, message: ContactMessage, attempts: int, error):
+        # Never raises: the message itself is already stored and shown in the
+        # admin inbox, only its notification is lost
+        logger.error(f"Giving up on email for contact message {message.id} after {attempts} attempts: {error}")
+        try:
+            await storage.email_dead_letters.insert_one({
+                "id": message.id,
+                "message": prepare_for_mongo(message.dict()),
+                "attempts": attempts,
+                "error": str(error),
+                "failed_at": datetime.now(timezone.utc).isoformat(),
+            })
+        except Exception as e:
+            logger.error(f"Failed to store the dead letter for contact message {message.id}: {e}")
+
+    def retry_dead_letter(self, message: ContactMessage):
+        self.start()
+        self._email_queue.put_nowait((message, 1))
+
+    async def stop(self):
+        if not self._tasks:
+            return
+        # Flush queued submissions and let in-flight emails finish
+        try:
+            await asyncio.wait_for(self._queue.join(), PIPELINE_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Contact messages were not all stored before shutdown")
+        self._writer.cancel()
+        unwritten = list(self._unwritten)
+        while not self._queue.empty():
+            unwritten.append(self._queue.get_nowait())
+        if unwritten:
+            try:
+                path = await asyncio.to_thread(spool_contact_messages, [prepare_for_mongo(message.dict()) for message in unwritten])
+                logger.warning(f"Saved {len(unwritten)} unstored contact messages to {path}; they are stored on the next start")
+            except OSError as e:
+                logger.error(f"Lost {len(unwritten)} contact messages ({', '.join(message.id for message in unwritten)}): {e}")
+        try:
+            await asyncio.wait_for(self._email_queue.join(), PIPELINE_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Contact pipeline did not drain before shutdown")
+        # Anything still waiting for delivery goes to the dead-letter store
+        # (retries that already finished have put their email back in the queue)
+        pending = [payload for task, payload in self._retries.items() if not task.done()]
+        for task in self._tasks + list(self._retries):
+            task.cancel()
+        self._retries.clear()
+        if self._replaying is not None:
+            # Unfinished replay: hand the file to the next start
+            os.replace(self._replaying, self._replaying.with_name(self._replaying.name.split(".ndjson")[0] + ".ndjson"))
+            self._replaying = None
+        while not self._email_queue.empty():
+            pending.append(self._email_queue.get_nowait())
+        for message, attempt in pending:
+            await self._dead_letter(message, attempt, "shutdown before delivery")
+        self._tasks = []
+        self._writer = None
+
+contact_pipeline = ContactPipeline()
+
+# Abuse protection for the public contact form: token buckets per client IP
+# and per email address, suppression of repeated identical messages, and
+# load shedding while the write pipeline is backed up or MongoDB is slow.
+CONTACT_IP_RATE_PER_MINUTE = float(os.environ.get('CONTACT_IP_RATE_PER_MINUTE', '5'))
+CONTACT_IP_BURST = float(os.environ.get('CONTACT_IP_BURST', '10'))
+CONTACT_EMAIL_RATE_PER_MINUTE = float(os.environ.get('CONTACT_EMAIL_RATE_PER_MINUTE', '2'))
+CONTACT_EMAIL_BURST = float(os.environ.get('CONTACT_EMAIL_BURST', '5'))
+CONTACT_DUPLICATE_WINDOW_SECONDS = float(os.environ.get('CONTACT_DUPLICATE_WINDOW_SECONDS', '600'))
+CONTACT_SHED_QUEUE_DEPTH = int(os.environ.get('CONTACT_SHED_QUEUE_DEPTH', str(CONTACT_QUEUE_SIZE * 8 // 10)))
+CONTACT_SHED_DB_LATENCY_MS = float(os.environ.get('CONTACT_SHED_DB_LATENCY_MS', '500'))
+# A slow write only sheds load for this long, then traffic probes the DB again
+CONTACT_SHED_LATENCY_TTL_SECONDS = 30
+TRUST_PROXY_HEADERS = os.environ.get('TRUST_PROXY_HEADERS', 'false').lower() == 'true'
+# Proxies in front of the API that each append the address they saw to X-Forwarded-For
+TRUSTED_PROXY_HOPS = max(1, int(os.environ.get('TRUSTED_PROXY_HOPS', '1')))
+RATE_LIMIT_MAX_KEYS = 10000
+
+class TokenBucketLimiter:
+    def __init__(self, rate_per_minute: float, burst: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def acquire(self, key: str) -> float:
+        # Returns 0 when a token was taken, otherwise seconds until one is available
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        # Forget the least recently seen clients first
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+class RecentMessages:
+    def __init__(self, window: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.window = window
+        self.max_keys = max_keys
+        self._messages: "OrderedDict[str, Tuple[float, ContactMessage]]" = OrderedDict()
+
+    @staticmethod
+    def fingerprint(message_data: ContactMessageCreate) -> str:
+        text = " ".join(message_data.message.split()).casefold()
+        raw = f"{message_data.email.strip().casefold()}\0{message_data.name.strip().casefold()}\0{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, fingerprint: str) -> Optional[ContactMessage]:
+        now = time.monotonic()
+        # Entries are in insertion order, so expired ones are at the front
+        while self._messages and next(iter(self._messages.values()))[0] < now - self.window:
+            self._messages.popitem(last=False)
+        entry = self._messages.get(fingerprint)
+        return entry[1] if entry else None
+
+    def add(self, fingerprint: str, message: ContactMessage):
+        self._messages[fingerprint] = (time.monotonic(), message)
+        while len(self._messages) > self.max_keys:
+            self._messages.popitem(last=False)
+
+contact_ip_limiter = TokenBucketLimiter(CONTACT_IP_RATE_PER_MINUTE, CONTACT_IP_BURST)
+contact_email_limiter = TokenBucketLimiter(CONTACT_EMAIL_RATE_PER_MINUTE, CONTACT_EMAIL_BURST)
+recent_contact_messages = RecentMessages(CONTACT_DUPLICATE_WINDOW_SECONDS)
+
+def client_ip(request: Request) -> str:
+    if TRUST_PROXY_HEADERS:
+        # The client controls the leading entries, so count trusted hops from the right
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for address in header.split(",")
+            if address.strip()
+        ]
+        if forwarded:
+            return forwarded[max(0, len(forwarded) - TRUSTED_PROXY_HOPS)]
+    return request.client.host if request.client else "unknown"
+
+def contact_overloaded() -> bool:
+    if contact_pipeline.pending >= CONTACT_SHED_QUEUE_DEPTH:
+        return True
+    recent = time.monotonic() - contact_pipeline.write_latency_at < CONTACT_SHED_LATENCY_TTL_SECONDS
+    return recent and contact_pipeline.write_latency * 1000 > CONTACT_SHED_DB_LATENCY_MS
+
+def too_many_requests(wait: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many messages, please try again later",
+        headers={"Retry-After": str(math.ceil(wait))},
+    )
+
 # Contact endpoints
 @api_router.post("/contact", response_model=ContactMessage)
-async def create_contact_message(message_data: ContactMessageCreate):
+async def create_contact_message(message_data: ContactMessageCreate, request: Request):
+    if contact_overloaded():
+        raise HTTPException(status_code=503, detail="Service busy, please try again later", headers={"Retry-After": "5"})
+    # A resubmitted form (double click, bot replay) gets the original message back
+    fingerprint = RecentMessages.fingerprint(message_data)
+    duplicate = recent_contact_messages.get(fingerprint)
+    if duplicate is not None:
+        return duplicate
+    wait = contact_ip_limiter.acquire(client_ip(request))
+    if wait:
+        raise too_many_requests(wait)
+    wait = contact_email_limiter.acquire(message_data.email.strip().casefold())
+    if wait:
+        raise too_many_requests(wait)
     message = ContactMessage(**message_data.dict())
-    message_dict = prepare_for_mongo(message.dict())
-    await db.contact_messages.insert_one(message_dict)
-    
-    # Send email notification (to adk700@yandex.ru but not displayed on frontend)
-    await send_email_notification(message)
-    
+    # Stored and emailed (to adk700@yandex.ru but not displayed on frontend)
+    # by the background pipeline
+    if not contact_pipeline.submit(message):
+        raise HTTPException(status_code=503, detail="Service busy, please try again later", headers={"Retry-After": "5"})
+    recent_contact_messages.add(fingerprint, message)
     return message
 
+@api_router.get("/admin/email-dead-letters")
+async def get_email_dead_letters(admin: str = Depends(verify_admin)):
+    return await storage.email_dead_letters.find(sort=[("failed_at", -1)], limit=CONTACT_MAX_PAGE_SIZE)
+
+@api_router.post("/admin/email-dead-letters/retry")
+async def retry_email_dead_letters(admin: str = Depends(verify_admin)):
+    retried = 0
+    for letter in await storage.email_dead_letters.find():
+        contact_pipeline.retry_dead_letter(ContactMessage(**letter["message"]))
+        await storage.email_dead_letters.delete_one({"id": letter["id"]})
+        retried += 1
+    return {"retried": retried}
+
+# Keyset pagination for the admin inbox, newest first on (created_at, id).
+# The cursor is the opaque base64 encoding of the last message's sort key.
+CONTACT_PAGE_SIZE = 50
+CONTACT_MAX_PAGE_SIZE = 200
+
+def encode_contact_cursor(message: dict) -> str:
+    raw = json.dumps([message["created_at"], message["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_contact_cursor(cursor: str):
+    try:
+        created_at, message_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(created_at, str) or not isinstance(message_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, message_id
+
+def as_utc(value: datetime) -> datetime:
+    # Naive query parameters are taken to be UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def to_mongo_timestamp(value: datetime) -> str:
+    # created_at is stored as an ISO string in UTC (see prepare_for_mongo)
+    return as_utc(value).isoformat()
+
+def contact_messages_query(
+    cursor: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    email: Optional[str] = None,
+) -> dict:
+    conditions = []
+    if email:
+        conditions.append({"email": email.strip()})
+    created_at = {}
+    if created_from is not None:
+        created_at["$gte"] = to_mongo_timestamp(created_from)
+    if created_to is not None:
+        created_at["$lt"] = to_mongo_timestamp(created_to)
+    if created_at:
+        conditions.append({"created_at": created_at})
+    if cursor:
+        last_created_at, last_id = decode_contact_cursor(cursor)
+        conditions.append({"$or": [
+            {"created_at": {"$lt": last_created_at}},
+            {"created_at": last_created_at, "id": {"$lt": last_id}},
+        ]})
+    if not conditions:
+        return {}
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+CONTACT_SORT = [("created_at", -1), ("id", -1)]
+
 @api_router.get("/contact", response_model=List[ContactMessage])
-async def get_contact_messages(admin: str = Depends(verify_admin)):
-    messages = await db.contact_messages.find().sort("created_at", -1).to_list(length=None)
+async def get_contact_messages(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=CONTACT_MAX_PAGE_SIZE),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    email: Optional[str] = None,
+    stream: bool = False,
+    admin: str = Depends(verify_admin),
+):
+    query = contact_messages_query(cursor, created_from, created_to, email)
+    if streaming_requested(request, stream):
+        # Streams every matching message unless a limit is given
+        messages_cursor = storage.contact_messages.iterate(
+            query, response_fields(ContactMessage), sort=CONTACT_SORT, limit=limit, batch_size=STREAM_BATCH_SIZE,
+        )
+        return stream_documents(request, messages_cursor, ContactMessage)
+    limit = limit or CONTACT_PAGE_SIZE
+    # Fetch one extra document to know whether another page exists
+    messages = await storage.contact_messages.find(query, sort=CONTACT_SORT, limit=limit + 1)
+    if len(messages) > limit:
+        messages = messages[:limit]
+        response.headers["X-Next-Cursor"] = encode_contact_cursor(messages[-1])
+    return [ContactMessage(**message) for message in messages]
+
+# Inbox export for spreadsheets and analytics. Messages are read from a
+# cursor CONTACT_EXPORT_CHUNK_ROWS at a time and each chunk is encoded and
+# sent before the next one is read: one CSV block, or one Parquet row group
+# (the footer follows the last group), so memory use does not depend on the
+# size of the inbox. Encoding runs in a thread to keep the event loop free.
+# pandas and pyarrow take about 80 MB per worker, so they are only imported
+# once an export is requested; without pyarrow the export is CSV only.
+CONTACT_EXPORT_CHUNK_ROWS = int(os.environ.get('CONTACT_EXPORT_CHUNK_ROWS', '5000'))
+CONTACT_EXPORT_COLUMNS = list(response_fields(ContactMessage))
+CONTACT_EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "parquet": "application/vnd.apache.parquet"}
+
+class ChunkSink:
+    # Write-only file object for ParquetWriter; take() hands over what was
+    # written since the last call
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+def contact_frame(rows: List[dict]):
+    import pandas as pd
+    return pd.DataFrame.from_records(rows, columns=CONTACT_EXPORT_COLUMNS)
+
+# Spreadsheets evaluate cells starting with these as formulas; messages come
+# from anonymous visitors, so such values are exported as text
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def escape_formula(value):
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+class CsvEncoder:
+    def __init__(self):
+        self._header = True
+
+    def encode(self, rows: List[dict]) -> bytes:
+        text = contact_frame(rows).map(escape_formula).to_csv(index=False, header=self._header)
+        # Byte order mark so Excel reads the file as UTF-8
+        prefix = "\ufeff" if self._header else ""
+        self._header = False
+        return (prefix + text).encode("utf-8")
+
+    def finish(self) -> bytes:
+        return b"" if not self._header else self.encode([])
+
+class ParquetEncoder:
+    def __init__(self):
+        import pyarrow
+        import pyarrow.parquet
+        self._schema = pyarrow.schema([
+            ("id", pyarrow.string()),
+            ("name", pyarrow.string()),
+            ("email", pyarrow.string()),
+            ("message", pyarrow.string()),
+            ("created_at", pyarrow.timestamp("us", tz="UTC")),
+        ])
+        self._sink = ChunkSink()
+        self._writer = pyarrow.parquet.ParquetWriter(self._sink, self._schema, compression="zstd")
+
+    def encode(self, rows: List[dict]) -> bytes:
+        import pandas as pd
+        import pyarrow
+        frame = contact_frame(rows)
+        frame["created_at"] = pd.to_datetime(frame["created_at"], utc=True, format="ISO8601")
+        self._writer.write_table(pyarrow.Table.from_pandas(frame, schema=self._schema, preserve_index=False))
+        return self._sink.take()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.take()
+
+@api_router.get("/contact/export")
+async def export_contact_messages(
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    email: Optional[str] = None,
+    admin: str = Depends(verify_admin),
+):
+    if format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    encoder = await asyncio.to_thread(ParquetEncoder if format == "parquet" else CsvEncoder)
+    query = contact_messages_query(None, created_from, created_to, email)
+    messages_cursor = storage.contact_messages.iterate(
+        query, CONTACT_EXPORT_COLUMNS, sort=CONTACT_SORT, batch_size=CONTACT_EXPORT_CHUNK_ROWS,
+    )
+
+    async def generate():
+        rows = []
+        async for message in messages_cursor:
+            rows.append(message)
+            if len(rows) >= CONTACT_EXPORT_CHUNK_ROWS:
+                yield await asyncio.to_thread(encoder.encode, rows)
+                rows = []
+        if rows:
+            yield await asyncio.to_thread(encoder.encode, rows)
+        yield await asyncio.to_thread(encoder.finish)
+
+    filename = f"contact_messages-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.{format}"
+    return StreamingResponse(
+        generate(),
+        media_type=CONTACT_EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# Retention for the contact inbox. Messages older than CONTACT_RETENTION_DAYS
+# are moved, oldest first and CONTACT_ARCHIVE_BATCH_SIZE at a time, into
+# gzip-compressed NDJSON files under CONTACT_ARCHIVE_DIR and then deleted. A
+# batch is only deleted once its file is on disk. A TTL index is not used:
+# created_at is an ISO string, and TTL deletion would skip the archive.
+# Archive file names carry the batch's created_at range and a hash of its ids,
+# so a batch archived twice (a crash before the delete, or two workers
+# sweeping at once) rewrites the same file. 0 days disables the sweeper.
+CONTACT_RETENTION_DAYS = float(os.environ.get('CONTACT_RETENTION_DAYS', '0'))
+CONTACT_ARCHIVE_DIR = Path(os.environ.get('CONTACT_ARCHIVE_DIR', str(ROOT_DIR / 'archive' / 'contact_messages')))
+CONTACT_ARCHIVE_BATCH_SIZE = int(os.environ.get('CONTACT_ARCHIVE_BATCH_SIZE', '1000'))
+CONTACT_ARCHIVE_INTERVAL_SECONDS = float(os.environ.get('CONTACT_ARCHIVE_INTERVAL_SECONDS', '3600'))
+CONTACT_ARCHIVE_PATTERN = re.compile(r"contact_messages\.(\d{8}T\d{6}Z)\.(\d{8}T\d{6}Z)\.([0-9a-f]{12})\.ndjson\.gz")
+CONTACT_ARCHIVE_SORT = [("created_at", 1), ("id", 1)]
+
+def archive_timestamp(created_at: str) -> str:
+    return datetime.fromisoformat(created_at).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+def write_contact_archive(documents: List[dict]) -> Path:
+    digest = hashlib.sha256("\n".join(document["id"] for document in documents).encode("utf-8")).hexdigest()[:12]
+    name = f"contact_messages.{archive_timestamp(documents[0]['created_at'])}.{archive_timestamp(documents[-1]['created_at'])}.{digest}.ndjson.gz"
+    path = CONTACT_ARCHIVE_DIR / name
+    CONTACT_ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as archive:
+            for document in documents:
+                archive.write(dump_json(document) + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temporary, path)
+    return path
+
+async def archive_contact_messages() -> dict:
+    cutoff = to_mongo_timestamp(datetime.now(timezone.utc) - timedelta(days=CONTACT_RETENTION_DAYS))
+    query = {"created_at": {"$lt": cutoff}}
+    archived = 0
+    files = []
+    while True:
+        batch = await storage.contact_messages.find(query, sort=CONTACT_ARCHIVE_SORT, limit=CONTACT_ARCHIVE_BATCH_SIZE)
+        if not batch:
+            break
+        path = await asyncio.to_thread(write_contact_archive, batch)
+        await storage.contact_messages.delete_many({"id": {"$in": [document["id"] for document in batch]}})
+        archived += len(batch)
+        files.append(path.name)
+        if len(batch) < CONTACT_ARCHIVE_BATCH_SIZE:
+            break
+    if archived:
+        logger.info(f"Archived {archived} contact messages older than {cutoff} into {len(files)} files")
+    return {"archived": archived, "cutoff": cutoff, "files": files}
+
+async def sweep_contact_messages():
+    while True:
+        try:
+            await archive_contact_messages()
+        except Exception as e:
+            logger.error(f"Contact message archival failed: {e}")
+        await asyncio.sleep(CONTACT_ARCHIVE_INTERVAL_SECONDS)
+
+def list_contact_archives() -> List[dict]:
+    archives = []
+    if not CONTACT_ARCHIVE_DIR.is_dir():
+        return archives
+    for path in CONTACT_ARCHIVE_DIR.iterdir():
+        match = CONTACT_ARCHIVE_PATTERN.fullmatch(path.name)
+        if not match:
+            continue
+        first, last, _ = match.groups()
+        archives.append({
+            "name": path.name,
+            "created_from": datetime.strptime(first, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc),
+            "created_to": datetime.strptime(last, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc),
+            "bytes": path.stat().st_size,
+        })
+    # Newest first, like the inbox
+    archives.sort(key=lambda archive: (archive["created_to"], archive["name"]), reverse=True)
+    return archives
+
+def search_contact_archives(
+    text: Optional[str],
+    email: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    limit: int,
+) -> List[dict]:
+    # Files are read line by line, newest first, until limit matches are found
+    query = contact_messages_query(None, created_from, created_to, email)
+    needle = text.casefold() if text else None
+    found: Dict[str, dict] = {}
+    for archive in list_contact_archives():
+        # File names are truncated to the second, so the range checks are inclusive
+        if created_from is not None and archive["created_to"] < as_utc(created_from).replace(microsecond=0):
+            continue
+        if created_to is not None and archive["created_from"] > as_utc(created_to):
+            continue
+        with gzip.open(CONTACT_ARCHIVE_DIR / archive["name"], "rt", encoding="utf-8") as lines:
+            for line in lines:
+                document = json.loads(line)
+                if not document_matches(document, query):
+                    continue
+                if needle and not any(needle in str(document.get(field, "")).casefold() for field in ("name", "email", "message")):
+                    continue
+                found[document["id"]] = document
+        if len(found) >= limit:
+            break
+    messages = sorted(found.values(), key=lambda document: (document["created_at"], document["id"]), reverse=True)
+    return messages[:limit]
+
+@api_router.get("/admin/contact-archives")
+async def get_contact_archives(admin: str = Depends(verify_admin)):
+    archives = await asyncio.to_thread(list_contact_archives)
+    return {"retention_days": CONTACT_RETENTION_DAYS, "archives": archives}
+
+@api_router.post("/admin/contact-archives/sweep")
+async def sweep_contact_archives(admin: str = Depends(verify_admin)):
+    if CONTACT_RETENTION_DAYS <= 0:
+        raise HTTPException(status_code=409, detail="CONTACT_RETENTION_DAYS is not set")
+    return await archive_contact_messages()
+
+@api_router.get("/admin/contact-archives/search", response_model=List[ContactMessage])
+async def search_archived_contact_messages(
+    q: Optional[str] = None,
+    email: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = Query(CONTACT_PAGE_SIZE, ge=1, le=CONTACT_MAX_PAGE_SIZE),
+    admin: str = Depends(verify_admin),
+):
+    messages = await asyncio.to_thread(search_contact_archives, q, email, created_from, created_to, limit)
     return [ContactMessage(**message) for message in messages]
 
+# View counters. POST /api/views is a beacon sent when a visitor opens a city
+# or an attraction. Each worker sums the views in memory and adds them to
+# content_views every VIEWS_FLUSH_SECONDS with one bulk $inc. The counts are
+# kept out of the cities collection so counting never invalidates cached
+# content or emits change events. GET /api/cities/popular serves a ranking
+# that is recomputed at most every POPULAR_REFRESH_SECONDS.
+VIEWS_FLUSH_SECONDS = float(os.environ.get('VIEWS_FLUSH_SECONDS', '10'))
+VIEWS_IP_RATE_PER_MINUTE = float(os.environ.get('VIEWS_IP_RATE_PER_MINUTE', '60'))
+VIEWS_IP_BURST = float(os.environ.get('VIEWS_IP_BURST', '30'))
+POPULAR_LIMIT = int(os.environ.get('POPULAR_LIMIT', '10'))
+POPULAR_REFRESH_SECONDS = float(os.environ.get('POPULAR_REFRESH_SECONDS', '60'))
+VIEW_SORT = [("views", -1), ("id", 1)]
+
+class ViewBeacon(BaseModel):
+    city_id: str
+    attraction: Optional[str] = None
+
+def view_id(city_id: str, attraction: Optional[str] = None) -> str:
+    return f"attraction:{city_id}:{attraction}" if attraction else f"city:{city_id}"
+
+# Cities and attractions that can be counted, rebuilt after cities change
+_view_targets: Tuple[int, Dict[str, dict]] = (-1, {})
+
+async def load_view_targets() -> Dict[str, dict]:
+    global _view_targets
+    # Picks up cities changed by other workers, see CONTENT_CACHE_TTL_SECONDS
+    await content_cache.get("cities", load_cities)
+    version = content_cache.version("cities")
+    if _view_targets[0] != version:
+        targets = {}
+        for city in await storage.cities.find(fields=("id", "attractions")):
+            targets[view_id(city["id"])] = {"type": "city", "city_id": city["id"]}
+            for attraction in city.get("attractions") or []:
+                if attraction.get("name"):
+                    targets[view_id(city["id"], attraction["name"])] = {
+                        "type": "attraction", "city_id": city["id"], "attraction": attraction["name"],
+                    }
+        _view_targets = (version, targets)
+    return _view_targets[1]
+
+class ViewCounter:
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._fields: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, document_id: str, fields: dict, count: int = 1):
+        self._counts[document_id] = self._counts.get(document_id, 0) + count
+        self._fields[document_id] = fields
+
+    async def flush(self):
+        if not self._counts:
+            return
+        counts, fields = self._counts, self._fields
+        self._counts, self._fields = {}, {}
+        try:
+            await storage.content_views.increment(
+                "views", [(document_id, count, fields[document_id]) for document_id, count in counts.items()],
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store {sum(counts.values())} views, retrying with the next flush: {e}")
+            for document_id, count in counts.items():
+                self.record(document_id, fields[document_id], count)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(VIEWS_FLUSH_SECONDS)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+view_counter = ViewCounter()
+views_ip_limiter = TokenBucketLimiter(VIEWS_IP_RATE_PER_MINUTE, VIEWS_IP_BURST)
+
+@api_router.post("/views", status_code=204)
+async def record_view(request: Request):
+    # navigator.sendBeacon posts text/plain to avoid a CORS preflight, so the
+    # body is parsed here whatever its content type
+    try:
+        beacon = ViewBeacon.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=format_validation_error(e))
+    document_id = view_id(beacon.city_id, beacon.attraction)
+    fields = (await load_view_targets()).get(document_id)
+    if fields is None:
+        raise HTTPException(status_code=404, detail="Unknown city or attraction")
+    # Views over the per-client rate are dropped; beacons ignore the response
+    if not views_ip_limiter.acquire(client_ip(request)):
+        view_counter.record(document_id, fields)
+    return Response(status_code=204)
+
+async def load_popular() -> dict:
+    cities = {city["id"]: city for city in await storage.cities.find(fields=("id", "name", "image_url", "attractions"))}
+    ranking = {"cities": [], "attractions": []}
+    # Counters of deleted cities and attractions are skipped, so read spare rows
+    for counter in await storage.content_views.find({"type": "city"}, sort=VIEW_SORT, limit=POPULAR_LIMIT * 2):
+        city = cities.get(counter["city_id"])
+        if city is not None and len(ranking["cities"]) < POPULAR_LIMIT:
+            ranking["cities"].append({
+                "id": city["id"], "name": city["name"], "image_url": city.get("image_url"), "views": counter["views"],
+            })
+    for counter in await storage.content_views.find({"type": "attraction"}, sort=VIEW_SORT, limit=POPULAR_LIMIT * 2):
+        city = cities.get(counter["city_id"])
+        if city is None or len(ranking["attractions"]) >= POPULAR_LIMIT:
+            continue
+        attraction = next((item for item in city.get("attractions") or [] if item.get("name") == counter["attraction"]), None)
+        if attraction is not None:
+            ranking["attractions"].append({
+                "city_id": city["id"], "city_name": city["name"], "name": attraction["name"],
+                "image_url": attraction.get("image_url"), "views": counter["views"],
+            })
+    return ranking
+
+class PopularRanking:
+    def __init__(self):
+        self._entry: Optional[CachedBody] = None
+        self._computed_at = 0.0
+        self._cities_version = -1
+        self._lock = asyncio.Lock()
+
+    def _stale(self) -> bool:
+        return (
+            self._entry is None
+            or self._cities_version != content_cache.version("cities")
+            or time.monotonic() - self._computed_at >= POPULAR_REFRESH_SECONDS
+        )
+
+    async def get(self) -> CachedBody:
+        await content_cache.get("cities", load_cities)
+        if self._stale():
+            async with self._lock:
+                # Concurrent requests wait for the one recomputing the ranking
+                if self._stale():
+                    cities_version = content_cache.version("cities")
+                    version = self._entry.version + 1 if self._entry else 0
+                    self._entry = CachedBody(version, dump_json(await load_popular()))
+                    self._computed_at = time.monotonic()
+                    self._cities_version = cities_version
+        return self._entry
+
+popular_ranking = PopularRanking()
+
 # Clear all data endpoint
 @api_router.post("/clear-data")
 async def clear_all_data(admin: str = Depends(verify_admin)):
-    await db.cities.delete_many({})
-    await db.history_events.delete_many({})
-    await db.culture_items.delete_many({})
+    await storage.cities.delete_many()
+    await storage.history_events.delete_many()
+    await storage.culture_items.delete_many()
+    await storage.content_views.delete_many()
+    content_cache.invalidate()
     return {"message": "All data cleared successfully"}
 
+# Natural keys used to match seeded documents on re-seeding
+SEED_KEYS = {
+    "cities": ["name"],
+    "history_events": ["title", "year"],
+    "culture_items": ["title"],
+}
+
+async def seed_collection(collection: str, model, items: List[dict]) -> dict:
+    documents = [prepare_for_mongo(model(**item_data).dict()) for item_data in items]
+    # id and created_at are only assigned when the document is first inserted
+    inserted, updated = await storage[collection].upsert_many(documents, SEED_KEYS[collection], insert_only=("id", "created_at"))
+    if inserted or updated:
+        content_cache.invalidate(collection)
+    return {"inserted": inserted, "updated": updated, "unchanged": len(documents) - inserted - updated}
+
+# Sample content seeded by init_sample_data
+# Cities with attractions
+SAMPLE_CITIES = [
+    {
+        "name": "Нижний Новгород",
+        "description": "Административный центр области, город с богатой историей у слияния Волги и Оки",
+        "image_url": "https://images.unsplash.com/photo-1666375786533-3eff441179e0",
+        "attractions": [
+            {
+                "name": "Нижегородский кремль",
+                "description": "Центральная крепость города с башнями, стенами и историческими залами; один из символов Нижнего Новгорода.",
+                "image_url": "https://images.unsplash.com/photo-1666375341472-ecbeaad2457b"
+            },
+            {
+                "name": "Чкаловская лестница",
+                "description": "Популярные прогулочные зоны с видами на реку и город. Набережные Оки и Волги создают неповторимую атмосферу.",
+                "image_url": "https://images.unsplash.com/photo-1666375704352-18561abe7ac2"
+            },
+            {
+                "name": "Большая Покровская улица",
+                "description": "Старый центр с улицами Большая Покровская, Рождественская, древние гильдейские и купеческие дома создают историческую атмосферу."
+            },
+            {
+                "name": "Музей истории художественных промыслов",
+                "description": "Городской исторический музей, художественные галереи, музей народных промыслов — позволяют глубже узнать прошлое города."
+            }
+        ]
+    },
+    {
+        "name": "Дивеево",
+        "description": "Духовный центр православия с Серафимо-Дивеевским монастырем",
+        "image_url": "https://images.unsplash.com/photo-1666375874745-b13060b8b890",
+        "attractions": [
+            {
+                "name": "Свято-Троицкий Серафимо-Дивеевский монастырь",
+                "description": "Один из крупнейших православных паломнических центров России. В Троицком соборе монастыря покоятся мощи преподобного Серафима Саровского.",
+                "image_url": "https://customer-assets.emergentagent.com/job_nizhny-guide/artifacts/3c3ycajs_%D0%B8%D0%B7%D0%BE%D0%B1%D1%80%D0%B0%D0%B6%D0%B5%D0%BD%D0%B8%D0%B5.png"
+            },
+            {
+                "name": "Святая Канавка",
+                "description": "Особый ритуальный путь, который обходит вокруг обители, символически замыкая «удел Богородицы»."
+            }
+        ]
+    },
+    {
+        "name": "Городец",
+        "description": "Древний город, центр городецкой росписи и народных промыслов",
+        "image_url": "https://images.unsplash.com/photo-1751311756590-64688d5b07d2",
+        "attractions": [
+            {
+                "name": "Музеи народного творчества",
+                "description": "Известен как один из центров городецкой росписи, с множеством мастерских и музеев народного творчества."
+            },
+            {
+                "name": "Набережная Волги",
+                "description": "Набережная и виды с реки Волги и Оки придают Городцу архитектурно-пейзажную привлекательность."
+            }
+        ]
+    },
+    {
+        "name": "Арзамас",
+        "description": "Исторический город с классической архитектурой",
+        "image_url": "https://images.unsplash.com/photo-1746531431171-f5c2c07f9eb1",
+        "attractions": [
+            {
+                "name": "Воскресенский собор",
+                "description": "Крупная доминанта города, возведённая в классическом стиле."
+            },
+            {
+                "name": "Дом Ханыкова",
+                "description": "Образец деревянного классицизма, одна из ценных архитектурных жемчужин старого Арзамаса."
+            },
+            {
+                "name": "Пустынские озёра",
+                "description": "Природная зона отдыха с живописными водными пейзажами."
+            }
+        ]
+    },
+    {
+        "name": "Семёнов",
+        "description": "Столица русской матрёшки и народных промыслов",
+        "image_url": "https://images.pexels.com/photos/12003131/pexels-photo-12003131.jpeg",
+        "attractions": [
+            {
+                "name": "Музей «Золотая Хохлома»",
+                "description": "Демонстрирует технологии создания знаменитой хохломской росписи и народные промыслы."
+            },
+            {
+                "name": "Семёновский историко-художественный музей",
+                "description": "Расположен в доме купца П. П. Шарыгина, где собраны образцы народного искусства региона."
+            }
+        ]
+    },
+    {
+        "name": "Выкса",
+        "description": "Промышленный город с богатой металлургической историей",
+        "image_url": "https://images.pexels.com/photos/34247673/pexels-photo-34247673.jpeg",
+        "attractions": [
+            {
+                "name": "Дом Баташевых",
+                "description": "Усадьба семьи промышленников, связанная с историей металлургического завода."
+            },
+            {
+                "name": "Шуховская водонапорная башня",
+                "description": "Промышленный памятник и символ инженерной истории Выксы."
+            }
+        ]
+    },
+    {
+        "name": "Павлово",
+        "description": "Город мастеров металлопродукции на берегу Оки",
+        "image_url": "https://images.unsplash.com/photo-1666375704352-18561abe7ac2",
+        "attractions": [
+            {
+                "name": "Павловский музей ножей и замков",
+                "description": "Музей представляет образцы металлического искусства местных кустарных промыслов."
+            },
+            {
+                "name": "Парк «Дальняя Круча»",
+                "description": "Один из старейших ландшафтных парков Павлова с аллеями, клумбами, прогулочными дорожками вдоль Оки."
+            }
+        ]
+    },
+    {
+        "name": "Балахна",
+        "description": "Старинный город на Волге с памятниками церковного зодчества",
+        "image_url": "https://images.unsplash.com/photo-1666375874745-b13060b8b890",
+        "attractions": [
+            {
+                "name": "Никольская церковь",
+                "description": "Один из древнейших архитектурных памятников города XVII–XIX веков."
+            },
+            {
+                "name": "Традиции ткачества",
+                "description": "Город известен своими традициями ткачества, кружев и ремёсел."
+            }
+        ]
+    }
+]
+
+# Historical events (same as before with corrected dates)
+SAMPLE_HISTORY = [
+    {
+        "title": "Основание Нижнего Новгорода",
+        "description": "Князь Юрий Всеволодович заложил город у слияния рек Оки и Волги. Нижний Новгород стал важным оборонительным пунктом и торговым центром на восточных границах Руси.",
+        "year": "1221"
+    },
+    {
+        "title": "Монголо-татарское нашествие",
+        "description": "Город подвергся разорению во время похода Батыя на северо-восточные земли Руси. После разрушения Нижний Новгород пришлось восстанавливать почти с нуля.",
+        "year": "1238"
+    },
+    {
+        "title": "Образование Нижегородско-Суздальского княжества",
+        "description": "Нижний Новгород стал центром самостоятельного княжества. Это усилило его политическую и экономическую роль в Северо-Восточной Руси.",
+        "year": "1341"
+    },
+    {
+        "title": "Присоединение к Московскому княжеству",
+        "description": "Московский князь Василий I включил Нижний Новгород в состав своих владений. Это стало важным шагом в объединении русских земель вокруг Москвы.",
+        "year": "1392"
+    },
+    {
+        "title": "Начало строительства каменного кремля",
+        "description": "На месте старых деревянных укреплений началось возведение каменного кремля. Он стал мощной оборонительной крепостью, символом власти и сердцем города.",
+        "year": "1508"
+    },
+    {
+        "title": "Народное ополчение Минина и Пожарского",
+        "description": "Именно в Нижнем Новгороде начался сбор второго народного ополчения против польско-литовских интервентов. Этот подвиг стал одним из ключевых событий Смутного времени.",
+        "year": "1611"
+    },
+    {
+        "title": "Учреждение Макарьевской ярмарки",
+        "description": "У стен Макарьевского монастыря была официально открыта ярмарка. Она быстро стала одним из важнейших торговых центров России XVII века.",
+        "year": "1641"
+    },
+    {
+        "title": "Пожар и перенос ярмарки в Нижний Новгород",
+        "description": "После пожара в Макарьеве ярмарку перенесли в Нижний Новгород. Здесь она стала крупнейшим торговым событием страны и дала мощный импульс развитию города.",
+        "year": "1816"
+    },
+    {
+        "title": "Строительство дома губернатора",
+        "description": "В кремле возводится дом губернатора — главный административный центр губернии. Здание стало архитектурной доминантой и местом пребывания высших чиновников.",
+        "year": "1838"
+    },
+    {
+        "title": "Строительство католического храма Успения Девы Марии",
+        "description": "В городе появился первый католический храм, ставший духовным центром для польской и литовской общин. Его архитектура выделяется среди построек того времени.",
+        "year": "1861"
+    },
+    {
+        "title": "Всероссийская художественно-промышленная выставка",
+        "description": "В Нижнем Новгороде прошла грандиозная выставка, продемонстрировавшая достижения промышленности и искусства. Город укрепил репутацию важного культурно-промышленного центра.",
+        "year": "1896"
+    },
+    {
+        "title": "Сормовские рабочие выступления",
+        "description": "Рабочие Сормовского завода участвовали в восстаниях в поддержку общероссийской революции. Это стало первым масштабным проявлением рабочего движения в регионе.",
+        "year": "1905"
+    },
+    {
+        "title": "Февральская и Октябрьская революции",
+        "description": "После свержения монархии в городе установилось двоевластие — Советы и Временное правительство. Осенью власть перешла к большевикам, началась новая эпоха.",
+        "year": "1917"
+    },
+    {
+        "title": "Гражданская война и становление советской власти",
+        "description": "В годы гражданской войны в регионе происходили бои и мобилизации. Нижний Новгород стал важным центром снабжения и политического контроля большевиков.",
+        "year": "1918"
+    },
+    {
+        "title": "Образование Нижегородской области",
+        "description": "Создана Нижегородская область в составе РСФСР. Это событие заложило основу современной административной структуры региона.",
+        "year": "1929"
+    },
+    {
+        "title": "Переименование города в Горький",
+        "description": "В честь писателя Максима Горького город получил новое имя — Горький. Это отражало идеологическую политику СССР по увековечению деятелей культуры.",
+        "year": "1932"
+    },
+    {
+        "title": "Великая Отечественная война",
+        "description": "Горьковская область стала одним из главных промышленных центров страны. Здесь производили танки, самолёты, вооружение. Более 800 тысяч жителей ушли на фронт, тысячи трудились в тылу на заводах и в госпиталях. Несмотря на бомбардировки и трудности, город выстоял и внёс огромный вклад в Победу.",
+        "year": "1941-1945"
+    },
+    {
+        "title": "Послевоенное развитие и рост города",
+        "description": "В 1950-е годы началась масштабная застройка новых районов и промышленных зон. После войны началось восстановление промышленности и инфраструктуры. Город превратился в крупный научно-производственный и культурный центр СССР.",
+        "year": "1950-е"
+    },
+    {
+        "title": "Возвращение имени «Нижний Новгород»",
+        "description": "После десятилетий под названием «Горький» городу и области вернули исторические имена. Это символизировало восстановление исторической преемственности и культурного наследия.",
+        "year": "1990"
+    },
+    {
+        "title": "Чемпионат мира по футболу",
+        "description": "Нижний Новгород стал одним из городов-хозяев ЧМ-2018. Был построен современный стадион, обновлены набережные и дороги. Турнир дал мощный толчок развитию туризма и городской инфраструктуры.",
+        "year": "2018"
+    },
+    {
+        "title": "Празднование 800-летия Нижнего Новгорода",
+        "description": "Город отметил юбилей масштабными культурными и общественными проектами. Были восстановлены исторические здания, благоустроены улицы и набережные, проведены десятки фестивалей и выставок.",
+        "year": "2021"
+    }
+]
+
+# Culture items
+SAMPLE_CULTURE = [
+    {
+        "title": "Хохломская роспись",
+        "description": "Традиционная роспись по дереву, возникшая в XVII веке в деревне Хохлома. Характеризуется яркими цветочными, ягодными и птичьими узорами на чёрном или золотом фоне с уникальным лаковым покрытием.",
+        "category": "craft"
+    },
+    {
+        "title": "Городецкая роспись",
+        "description": "Самобытный вид росписи по дереву с богатой палитрой и характерными сюжетами. Городец является центром этого промысла и настоящим музеем народного творчества.",
+        "category": "craft"
+    },
+    {
+        "title": "Семёновская матрёшка",
+        "description": "Знаменитая деревянная расписная кукла, ставшая символом русской народной культуры. Семёнов - признанная столица матрёшечного промысла.",
+        "category": "craft"
+    },
+    {
+        "title": "Павловские замки и ножи",
+        "description": "Традиционное металлообрабатывающее ремесло города Павлово, известное производством высококачественных замков, ножей и инструментов.",
+        "category": "craft"
+    },
+    {
+        "title": "Старообрядческие традиции",
+        "description": "Нижегородская область является одним из центров русского старообрядчества, сохраняющего древние церковные традиции и культурное наследие.",
+        "category": "tradition"
+    },
+    {
+        "title": "Керженский заповедник",
+        "description": "Уникальная природная территория с богатейшей флорой и фауной, место традиционных промыслов и экологического туризма. Густые леса и уникальные природные комплексы.",
+        "category": "nature"
+    }
+]
+
 # Initialize updated sample data endpoint
 @api_router.post("/init-data")
 async def init_sample_data(admin: str = Depends(verify_admin)):
-    # Clear existing data first
-    await db.cities.delete_many({})
-    await db.history_events.delete_many({})
-    await db.culture_items.delete_many({})
-    
-    # Cities with attractions
-    sample_cities = [
-        {
-            "name": "Нижний Новгород",
-            "description": "Административный центр области, город с богатой историей у слияния Волги и Оки",
-            "image_url": "https://images.unsplash.com/photo-1666375786533-3eff441179e0",
-            "attractions": [
-                {
-                    "name": "Нижегородский кремль",
-                    "description": "Центральная крепость города с башнями, стенами и историческими залами; один из символов Нижнего Новгорода.",
-                    "image_url": "https://images.unsplash.com/photo-1666375341472-ecbeaad2457b"
-                },
-                {
-                    "name": "Чкаловская лестница",
-                    "description": "Популярные прогулочные зоны с видами на реку и город. Набережные Оки и Волги создают неповторимую атмосферу.",
-                    "image_url": "https://images.unsplash.com/photo-1666375704352-18561abe7ac2"
-                },
-                {
-                    "name": "Большая Покровская улица",
-                    "description": "Старый центр с улицами Большая Покровская, Рождественская, древние гильдейские и купеческие дома создают историческую атмосферу."
-                },
-                {
-                    "name": "Музей истории художественных промыслов",
-                    "description": "Городской исторический музей, художественные галереи, музей народных промыслов — позволяют глубже узнать прошлое города."
-                }
-            ]
-        },
-        {
-            "name": "Дивеево",
-            "description": "Духовный центр православия с Серафимо-Дивеевским монастырем",
-            "image_url": "https://images.unsplash.com/photo-1666375874745-b13060b8b890",
-            "attractions": [
-                {
-                    "name": "Свято-Троицкий Серафимо-Дивеевский монастырь",
-                    "description": "Один из крупнейших православных паломнических центров России. В Троицком соборе монастыря покоятся мощи преподобного Серафима Саровского.",
-                    "image_url": "https://customer-assets.emergentagent.com/job_nizhny-guide/artifacts/3c3ycajs_%D0%B8%D0%B7%D0%BE%D0%B1%D1%80%D0%B0%D0%B6%D0%B5%D0%BD%D0%B8%D0%B5.png"
-                },
-                {
-                    "name": "Святая Канавка",
-                    "description": "Особый ритуальный путь, который обходит вокруг обители, символически замыкая «удел Богородицы»."
-                }
-            ]
-        },
-        {
-            "name": "Городец",
-            "description": "Древний город, центр городецкой росписи и народных промыслов",
-            "image_url": "https://images.unsplash.com/photo-1751311756590-64688d5b07d2",
-            "attractions": [
-                {
-                    "name": "Музеи народного творчества",
-                    "description": "Известен как один из центров городецкой росписи, с множеством мастерских и музеев народного творчества."
-                },
-                {
-                    "name": "Набережная Волги",
-                    "description": "Набережная и виды с реки Волги и Оки придают Городцу архитектурно-пейзажную привлекательность."
-                }
-            ]
-        },
-        {
-            "name": "Арзамас",
-            "description": "Исторический город с классической архитектурой",
-            "image_url": "https://images.unsplash.com/photo-1746531431171-f5c2c07f9eb1",
-            "attractions": [
-                {
-                    "name": "Воскресенский собор",
-                    "description": "Крупная доминанта города, возведённая в классическом стиле."
-                },
-                {
-                    "name": "Дом Ханыкова",
-                    "description": "Образец деревянного классицизма, одна из ценных архитектурных жемчужин старого Арзамаса."
-                },
-                {
-                    "name": "Пустынские озёра",
-                    "description": "Природная зона отдыха с живописными водными пейзажами."
-                }
-            ]
-        },
-        {
-            "name": "Семёнов",
-            "description": "Столица русской матрёшки и народных промыслов",
-            "image_url": "https://images.pexels.com/photos/12003131/pexels-photo-12003131.jpeg",
-            "attractions": [
-                {
-                    "name": "Музей «Золотая Хохлома»",
-                    "description": "Демонстрирует технологии создания знаменитой хохломской росписи и народные промыслы."
-                },
-                {
-                    "name": "Семёновский историко-художественный музей",
-                    "description": "Расположен в доме купца П. П. Шарыгина, где собраны образцы народного искусства региона."
-                }
-            ]
-        },
-        {
-            "name": "Выкса",
-            "description": "Промышленный город с богатой металлургической историей",
-            "image_url": "https://images.pexels.com/photos/34247673/pexels-photo-34247673.jpeg",
-            "attractions": [
-                {
-                    "name": "Дом Баташевых",
-                    "description": "Усадьба семьи промышленников, связанная с историей металлургического завода."
-                },
-                {
-                    "name": "Шуховская водонапорная башня",
-                    "description": "Промышленный памятник и символ инженерной истории Выксы."
-                }
-            ]
-        },
-        {
-            "name": "Павлово",
-            "description": "Город мастеров металлопродукции на берегу Оки",
-            "image_url": "https://images.unsplash.com/photo-1666375704352-18561abe7ac2",
-            "attractions": [
-                {
-                    "name": "Павловский музей ножей и замков",
-                    "description": "Музей представляет образцы металлического искусства местных кустарных промыслов."
-                },
-                {
-                    "name": "Парк «Дальняя Круча»",
-                    "description": "Один из старейших ландшафтных парков Павлова с аллеями, клумбами, прогулочными дорожками вдоль Оки."
-                }
-            ]
-        },
-        {
-            "name": "Балахна",
-            "description": "Старинный город на Волге с памятниками церковного зодчества",
-            "image_url": "https://images.unsplash.com/photo-1666375874745-b13060b8b890",
-            "attractions": [
-                {
-                    "name": "Никольская церковь",
-                    "description": "Один из древнейших архитектурных памятников города XVII–XIX веков."
-                },
-                {
-                    "name": "Традиции ткачества",
-                    "description": "Город известен своими традициями ткачества, кружев и ремёсел."
-                }
-            ]
-        }
-    ]
-    
-    for city_data in sample_cities:
-        city = City(**city_data)
-        city_dict = prepare_for_mongo(city.dict())
-        await db.cities.insert_one(city_dict)
-    
-    # Historical events (same as before with corrected dates)
-    sample_history = [
-        {
-            "title": "Основание Нижнего Новгорода",
-            "description": "Князь Юрий Всеволодович заложил город у слияния рек Оки и Волги. Нижний Новгород стал важным оборонительным пунктом и торговым центром на восточных границах Руси.",
-            "year": "1221"
-        },
-        {
-            "title": "Монголо-татарское нашествие",
-            "description": "Город подвергся разорению во время похода Батыя на северо-восточные земли Руси. После разрушения Нижний Новгород пришлось восстанавливать почти с нуля.",
-            "year": "1238"
-        },
-        {
-            "title": "Образование Нижегородско-Суздальского княжества",
-            "description": "Нижний Новгород стал центром самостоятельного княжества. Это усилило его политическую и экономическую роль в Северо-Восточной Руси.",
-            "year": "1341"
-        },
-        {
-            "title": "Присоединение к Московскому княжеству",
-            "description": "Московский князь Василий I включил Нижний Новгород в состав своих владений. Это стало важным шагом в объединении русских земель вокруг Москвы.",
-            "year": "1392"
-        },
-        {
-            "title": "Начало строительства каменного кремля",
-            "description": "На месте старых деревянных укреплений началось возведение каменного кремля. Он стал мощной оборонительной крепостью, символом власти и сердцем города.",
-            "year": "1508"
-        },
-        {
-            "title": "Народное ополчение Минина и Пожарского",
-            "description": "Именно в Нижнем Новгороде начался сбор второго народного ополчения против польско-литовских интервентов. Этот подвиг стал одним из ключевых событий Смутного времени.",
-            "year": "1611"
-        },
-        {
-            "title": "Учреждение Макарьевской ярмарки",
-            "description": "У стен Макарьевского монастыря была официально открыта ярмарка. Она быстро стала одним из важнейших торговых центров России XVII века.",
-            "year": "1641"
-        },
-        {
-            "title": "Пожар и перенос ярмарки в Нижний Новгород",
-            "description": "После пожара в Макарьеве ярмарку перенесли в Нижний Новгород. Здесь она стала крупнейшим торговым событием страны и дала мощный импульс развитию города.",
-            "year": "1816"
-        },
-        {
-            "title": "Строительство дома губернатора",
-            "description": "В кремле возводится дом губернатора — главный административный центр губернии. Здание стало архитектурной доминантой и местом пребывания высших чиновников.",
-            "year": "1838"
-        },
-        {
-            "title": "Строительство католического храма Успения Девы Марии",
-            "description": "В городе появился первый католический храм, ставший духовным центром для польской и литовской общин. Его архитектура выделяется среди построек того времени.",
-            "year": "1861"
-        },
-        {
-            "title": "Всероссийская художественно-промышленная выставка",
-            "description": "В Нижнем Новгороде прошла грандиозная выставка, продемонстрировавшая достижения промышленности и искусства. Город укрепил репутацию важного культурно-промышленного центра.",
-            "year": "1896"
-        },
-        {
-            "title": "Сормовские рабочие выступления",
-            "description": "Рабочие Сормовского завода участвовали в восстаниях в поддержку общероссийской революции. Это стало первым масштабным проявлением рабочего движения в регионе.",
-            "year": "1905"
-        },
-        {
-            "title": "Февральская и Октябрьская революции",
-            "description": "После свержения монархии в городе установилось двоевластие — Советы и Временное правительство. Осенью власть перешла к большевикам, началась новая эпоха.",
-            "year": "1917"
-        },
-        {
-            "title": "Гражданская война и становление советской власти",
-            "description": "В годы гражданской войны в регионе происходили бои и мобилизации. Нижний Новгород стал важным центром снабжения и политического контроля большевиков.",
-            "year": "1918"
-        },
-        {
-            "title": "Образование Нижегородской области",
-            "description": "Создана Нижегородская область в составе РСФСР. Это событие заложило основу современной административной структуры региона.",
-            "year": "1929"
-        },
-        {
-            "title": "Переименование города в Горький",
-            "description": "В честь писателя Максима Горького город получил новое имя — Горький. Это отражало идеологическую политику СССР по увековечению деятелей культуры.",
-            "year": "1932"
-        },
-        {
-            "title": "Великая Отечественная война",
-            "description": "Горьковская область стала одним из главных промышленных центров страны. Здесь производили танки, самолёты, вооружение. Более 800 тысяч жителей ушли на фронт, тысячи трудились в тылу на заводах и в госпиталях. Несмотря на бомбардировки и трудности, город выстоял и внёс огромный вклад в Победу.",
-            "year": "1941-1945"
-        },
-        {
-            "title": "Послевоенное развитие и рост города",
-            "description": "В 1950-е годы началась масштабная застройка новых районов и промышленных зон. После войны началось восстановление промышленности и инфраструктуры. Город превратился в крупный научно-производственный и культурный центр СССР.",
-            "year": "1950-е"
-        },
-        {
-            "title": "Возвращение имени «Нижний Новгород»",
-            "description": "После десятилетий под названием «Горький» городу и области вернули исторические имена. Это символизировало восстановление исторической преемственности и культурного наследия.",
-            "year": "1990"
-        },
-        {
-            "title": "Чемпионат мира по футболу",
-            "description": "Нижний Новгород стал одним из городов-хозяев ЧМ-2018. Был построен современный стадион, обновлены набережные и дороги. Турнир дал мощный толчок развитию туризма и городской инфраструктуры.",
-            "year": "2018"
-        },
-        {
-            "title": "Празднование 800-летия Нижнего Новгорода",
-            "description": "Город отметил юбилей масштабными культурными и общественными проектами. Были восстановлены исторические здания, благоустроены улицы и набережные, проведены десятки фестивалей и выставок.",
-            "year": "2021"
-        }
-    ]
-    
-    for event_data in sample_history:
-        event = HistoryEvent(**event_data)
-        event_dict = prepare_for_mongo(event.dict())
-        await db.history_events.insert_one(event_dict)
-    
-    # Culture items
-    sample_culture = [
-        {
-            "title": "Хохломская роспись",
-            "description": "Традиционная роспись по дереву, возникшая в XVII веке в деревне Хохлома. Характеризуется яркими цветочными, ягодными и птичьими узорами на чёрном или золотом фоне с уникальным лаковым покрытием.",
-            "category": "craft"
-        },
-        {
-            "title": "Городецкая роспись",
-            "description": "Самобытный вид росписи по дереву с богатой палитрой и характерными сюжетами. Городец является центром этого промысла и настоящим музеем народного творчества.",
-            "category": "craft"
-        },
-        {
-            "title": "Семёновская матрёшка",
-            "description": "Знаменитая деревянная расписная кукла, ставшая символом русской народной культуры. Семёнов - признанная столица матрёшечного промысла.",
-            "category": "craft"
-        },
-        {
-            "title": "Павловские замки и ножи",
-            "description": "Традиционное металлообрабатывающее ремесло города Павлово, известное производством высококачественных замков, ножей и инструментов.",
-            "category": "craft"
-        },
-        {
-            "title": "Старообрядческие традиции",
-            "description": "Нижегородская область является одним из центров русского старообрядчества, сохраняющего древние церковные традиции и культурное наследие.",
-            "category": "tradition"
-        },
-        {
-            "title": "Керженский заповедник",
-            "description": "Уникальная природная территория с богатейшей флорой и фауной, место традиционных промыслов и экологического туризма. Густые леса и уникальные природные комплексы.",
-            "category": "nature"
-        }
-    ]
-    
-    for item_data in sample_culture:
-        item = CultureItem(**item_data)
-        item_dict = prepare_for_mongo(item.dict())
-        await db.culture_items.insert_one(item_dict)
-    
-    return {"message": "Updated sample data with cities structure initialized successfully"}
+    # Upsert everything concurrently; existing documents stay readable throughout
+    cities, history, culture = await asyncio.gather(
+        seed_collection("cities", City, SAMPLE_CITIES),
+        seed_collection("history_events", HistoryEvent, SAMPLE_HISTORY),
+        seed_collection("culture_items", CultureItem, SAMPLE_CULTURE),
+    )
+    return {
+        "message": "Updated sample data with cities structure initialized successfully",
+        "cities": cities,
+        "history_events": history,
+        "culture_items": culture,
+    }
+
+# NDJSON bulk import/export of content collections, keyed by their public route
+CONTENT_TYPES = {
+    "cities": ("cities", CityCreate, City),
+    "history": ("history_events", HistoryEventCreate, HistoryEvent),
+    "culture": ("culture_items", CultureItemCreate, CultureItem),
+}
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_LINE_BYTES = 1024 * 1024
+IMPORT_MAX_ERRORS = 1000
+EXPORT_BATCH_SIZE = 500
+
+def resolve_content_type(content_type: str):
+    if content_type not in CONTENT_TYPES:
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {content_type}")
+    return CONTENT_TYPES[content_type]
+
+async def iter_ndjson_lines(chunks):
+    # Yields (line number, line bytes); oversized lines are yielded as None
+    # and skipped without buffering them
+    buffer = b""
+    line_no = 0
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            line, buffer = buffer[:newline], buffer[newline + 1:]
+            line_no += 1
+            if skipping:
+                skipping = False
+                yield line_no, None
+            elif len(line) > IMPORT_MAX_LINE_BYTES:
+                # Arrived whole within one chunk
+                yield line_no, None
+            else:
+                yield line_no, line
+        if not skipping and len(buffer) > IMPORT_MAX_LINE_BYTES:
+            skipping = True
+        if skipping:
+            buffer = b""
+    if skipping:
+        yield line_no + 1, None
+    elif buffer.strip():
+        yield line_no + 1, buffer
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'line'}: {e['msg']}" for e in error.errors())
+
+async def write_import_batch(collection: str, documents: List[dict]) -> Tuple[int, int]:
+    # Replace by id so importing the same export twice is idempotent
+    return await storage[collection].replace_many(documents)
+
+@api_router.post("/admin/import/{content_type}")
+async def import_content(content_type: str, request: Request, admin: str = Depends(verify_admin)):
+    collection, create_model, model = resolve_content_type(content_type)
+    inserted = updated = error_count = 0
+    errors = []
+    batch = []
+
+    def add_error(line_no: int, message: str):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"line": line_no, "error": message})
+
+    async for line_no, line in iter_ndjson_lines(request.stream()):
+        if line is None:
+            add_error(line_no, f"Line exceeds {IMPORT_MAX_LINE_BYTES} bytes")
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object")
+            item_data = create_model(**data).dict()
+        except ValidationError as e:
+            add_error(line_no, format_validation_error(e))
+            continue
+        except ValueError as e:
+            add_error(line_no, f"Invalid JSON: {e}")
+            continue
+        # Exported documents keep their id and created_at across environments
+        for field in ("id", "created_at"):
+            if data.get(field) is not None:
+                item_data[field] = data[field]
+        try:
+            batch.append(prepare_for_mongo(model(**item_data).dict()))
+        except ValidationError as e:
+            add_error(line_no, format_validation_error(e))
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            batch_inserted, batch_updated = await write_import_batch(collection, batch)
+            inserted += batch_inserted
+            updated += batch_updated
+            batch = []
+    if batch:
+        batch_inserted, batch_updated = await write_import_batch(collection, batch)
+        inserted += batch_inserted
+        updated += batch_updated
+    if inserted or updated:
+        content_cache.invalidate(collection)
+    return {"inserted": inserted, "updated": updated, "error_count": error_count, "errors": errors}
+
+@api_router.get("/admin/export/{content_type}")
+async def export_content(content_type: str, admin: str = Depends(verify_admin)):
+    collection, _, _ = resolve_content_type(content_type)
+
+    async def generate():
+        async for document in storage[collection].iterate(batch_size=EXPORT_BATCH_SIZE):
+            yield (json.dumps(document, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{content_type}.ndjson"'},
+    )
+
+# Index management
+# Every index the endpoints rely on, declared per collection
+REQUIRED_INDEXES = {
+    "cities": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("name", 1)], name="name"),
+    ],
+    "history_events": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel(HISTORY_SORT, name="year_start_end"),
+        IndexModel([("title", 1), ("year", 1)], name="title_year"),
+    ],
+    "culture_items": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("title", 1)], name="title"),
+        IndexModel([("category", 1)], name="category"),
+    ],
+    "contact_messages": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel(CONTACT_SORT, name="created_at_id"),
+        IndexModel([("email", 1)] + CONTACT_SORT, name="email_created_at_id"),
+    ],
+    "content_views": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("type", 1)] + VIEW_SORT, name="type_views_id"),
+    ],
+}
+
+# Query shapes issued by the endpoints: equality-matched fields, then sort
+QUERY_SHAPES = {
+    "cities": [
+        {"equality": ["id"], "sort": []},
+        {"equality": SEED_KEYS["cities"], "sort": []},
+    ],
+    "history_events": [
+        {"equality": ["id"], "sort": []},
+        {"equality": [], "sort": HISTORY_SORT},
+        {"equality": SEED_KEYS["history_events"], "sort": []},
+    ],
+    "culture_items": [
+        {"equality": ["id"], "sort": []},
+        {"equality": SEED_KEYS["culture_items"], "sort": []},
+        {"equality": ["category"], "sort": []},
+    ],
+    "contact_messages": [
+        {"equality": ["id"], "sort": []},
+        {"equality": [], "sort": CONTACT_SORT},
+        {"equality": ["email"], "sort": CONTACT_SORT},
+    ],
+    "content_views": [
+        {"equality": ["id"], "sort": []},
+        {"equality": ["type"], "sort": VIEW_SORT},
+    ],
+}
+
+def index_supports(index_keys: list, shape: dict) -> bool:
+    # Equality fields must form the index prefix (in any order), followed
+    # by the sort fields in order, either all forward or all reversed
+    equality = shape["equality"]
+    sort = shape["sort"]
+    fields = [field for field, _ in index_keys]
+    if len(fields) < len(equality) + len(sort):
+        return False
+    if set(fields[:len(equality)]) != set(equality):
+        return False
+    if not sort:
+        return True
+    tail = index_keys[len(equality):len(equality) + len(sort)]
+    forward = [(field, direction) for field, direction in sort]
+    backward = [(field, -direction) for field, direction in sort]
+    return tail in (forward, backward)
+
+async def ensure_indexes():
+    if not storage.indexed:
+        return
+    for collection, models in REQUIRED_INDEXES.items():
+        try:
+            created = await storage[collection].ensure_indexes(models)
+            if created:
+                logger.info(f"Created indexes on {collection}: {', '.join(created)}")
+        except Exception as e:
+            logger.error(f"Failed to create indexes on {collection}: {e}")
+        existing = await storage[collection].index_keys()
+        for shape in QUERY_SHAPES.get(collection, []):
+            if not any(index_supports(keys, shape) for keys in existing):
+                logger.warning(f"No index supports {collection} query shape {shape}")
+
+async def migrate_history_years():
+    # Backfill year_start/year_end on events written before they existed
+    updates = []
+    for event in await storage.history_events.find({"year_start": {"$exists": False}}, ("id", "year")):
+        try:
+            year_start, year_end = parse_year_range(str(event.get("year", "")))
+        except ValueError:
+            logger.warning(f"History event {event.get('id')} has unparseable year {event.get('year')!r}")
+            year_start = year_end = None
+        updates.append((event["id"], {"year_start": year_start, "year_end": year_end}))
+    if updates:
+        await storage.history_events.set_fields(updates)
+        content_cache.invalidate("history_events")
+        logger.info(f"Backfilled year range on {len(updates)} history events")
+
+@api_router.get("/admin/indexes")
+async def get_index_stats(admin: str = Depends(verify_admin)):
+    return {collection: await storage[collection].index_stats() for collection in REQUIRED_INDEXES}
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -502,7 +2719,44 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(MetricsMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(content=generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
+
+# Probes for the orchestrator. /healthz only shows that the process serves
+# requests. /readyz also requires a finished startup (indexes, migrations,
+# warm caches), a database answering within READY_TIMEOUT_SECONDS and free
+# connections in the MongoDB pool; it fails again once shutdown begins.
+READY_TIMEOUT_SECONDS = float(os.environ.get('READY_TIMEOUT_SECONDS', '2'))
+READY_MAX_POOL_SATURATION = float(os.environ.get('READY_MAX_POOL_SATURATION', '0.9'))
+lifecycle = {"started": False, "stopping": False}
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    ready = lifecycle["started"] and not lifecycle["stopping"]
+    report = {"startup": "stopping" if lifecycle["stopping"] else "complete" if lifecycle["started"] else "pending"}
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(storage.ping(), READY_TIMEOUT_SECONDS)
+        report["storage"] = {"backend": storage.name, "status": "ok", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+    except Exception as e:
+        ready = False
+        report["storage"] = {"backend": storage.name, "status": "error", "error": str(e) or type(e).__name__}
+    if storage.name == "mongo":
+        pools = mongo_pool_metrics.snapshot(MONGO_MAX_POOL_SIZE)
+        report["pools"] = pools
+        if any(pool["saturation"] >= READY_MAX_POOL_SATURATION for pool in pools.values()):
+            ready = False
+    report["status"] = "ready" if ready else "unavailable"
+    return Response(content=dump_json(report), media_type="application/json", status_code=200 if ready else 503)
 
 # Configure logging
 logging.basicConfig(
@@ -511,6 +2765,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def bootstrap_database():
+    if storage.name == "memory":
+        logger.warning("Using the in-memory storage backend; data is lost on restart")
+    await ensure_indexes()
+    await migrate_history_years()
+    await search_index.ensure_current()
+    # Warm the public content caches before reporting ready
+    await load_bundle()
+    lifecycle["started"] = True
+
+@app.on_event("startup")
+async def start_contact_pipeline():
+    contact_pipeline.start()
+
+@app.on_event("startup")
+async def start_view_counter():
+    view_counter.start()
+
+contact_sweeper: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_contact_sweeper():
+    global contact_sweeper
+    if CONTACT_RETENTION_DAYS > 0:
+        contact_sweeper = asyncio.create_task(sweep_contact_messages())
+
+content_watcher: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_content_watcher():
+    global content_watcher
+    if EVENTS_CHANGE_STREAMS:
+        content_watcher = asyncio.create_task(watch_content_changes())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    lifecycle["stopping"] = True
+    event_broker.close()
+    if content_watcher is not None:
+        content_watcher.cancel()
+    if contact_sweeper is not None:
+        contact_sweeper.cancel()
+    await contact_pipeline.stop()
+    await view_counter.stop()
+    storage.close()
\ No newline at end of file
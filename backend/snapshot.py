@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Static snapshot of the public content.
+Writes the /api/cities, /api/history, /api/culture and /api/bundle responses
+as content-addressed JSON files with precompressed gzip/brotli variants and
+a manifest.json, so nginx or a CDN can serve them without the API. The
+bodies are produced by the same code as the API, byte for byte, and each
+file's hash is the ETag the API would send for it.
+
+    python snapshot.py export ../frontend/build/snapshot
+    python snapshot.py verify ../frontend/build/snapshot
+
+Every export writes:
+    <name>.<hash>.json[.gz|.br]   immutable, cache forever
+    <name>.json[.gz|.br]          latest copy for clients that do not read the manifest
+    manifest.json                 written last; maps each name to its current files
+
+The storage backend is configured as for the API (STORAGE_BACKEND, MONGO_URL,
+DB_NAME, SQLITE_PATH).
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+import typer
+
+import server
+
+app = typer.Typer(add_completion=False, help="Export the public content as static JSON files.")
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+# Hash characters kept in versioned file names
+NAME_HASH_CHARS = 16
+# File suffixes nginx's gzip_static and brotli_static look for
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+DECOMPRESSORS = {"gzip": gzip.decompress}
+if server.brotli is not None:
+    DECOMPRESSORS["br"] = server.brotli.decompress
+
+
+async def load_entries() -> dict:
+    # Names match the API paths
+    return {
+        "cities": await server.content_cache.get("cities", server.load_cities),
+        "history": await server.content_cache.get("history_events", server.load_history),
+        "culture": await server.content_cache.get("culture_items", server.load_culture),
+        "bundle": await server.load_bundle(),
+    }
+
+
+def write_atomic(path: Path, data: bytes):
+    # Readers never see a partially written file
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+def write_versioned(path: Path, data: bytes):
+    # Versioned files are content-addressed: an existing one is already correct
+    if path.exists():
+        path.touch()
+    else:
+        write_atomic(path, data)
+
+
+async def write_entry(out_dir: Path, name: str, entry: server.CachedBody, compress: bool) -> dict:
+    versioned = f"{name}.{entry.hash[:NAME_HASH_CHARS]}.json"
+    write_versioned(out_dir / versioned, entry.body)
+    write_atomic(out_dir / f"{name}.json", entry.body)
+    info = {
+        "path": versioned,
+        "latest": f"{name}.json",
+        "etag": entry.etag,
+        "sha256": hashlib.sha256(entry.body).hexdigest(),
+        "bytes": len(entry.body),
+        "encodings": {},
+    }
+    if compress and len(entry.body) >= server.COMPRESSION_MIN_BYTES:
+        for encoding in server.COMPRESSORS:
+            data = await entry.encoded(encoding)
+            suffix = ENCODING_SUFFIXES[encoding]
+            write_versioned(out_dir / (versioned + suffix), data)
+            write_atomic(out_dir / f"{name}.json{suffix}", data)
+            info["encodings"][encoding] = {
+                "path": versioned + suffix,
+                "etag": entry.etag_for(encoding),
+                "bytes": len(data),
+            }
+    return info
+
+
+def prune(out_dir: Path, name: str, keep: int) -> int:
+    # Older versions stay available for clients still holding a previous
+    # manifest; only the newest `keep` of each file are kept
+    pattern = re.compile(rf"{re.escape(name)}\.[0-9a-f]{{{NAME_HASH_CHARS}}}\.json")
+    versions = sorted(
+        (path for path in out_dir.iterdir() if pattern.fullmatch(path.name)),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    removed = 0
+    for path in versions[keep:]:
+        for suffix in ("", *ENCODING_SUFFIXES.values()):
+            variant = path.with_name(path.name + suffix)
+            if variant.exists():
+                variant.unlink()
+                removed += 1
+    return removed
+
+
+async def export_snapshot(out_dir: Path, compress: bool, keep: int) -> dict:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        entries = await load_entries()
+    finally:
+        server.storage.close()
+    files = {name: await write_entry(out_dir, name, entry, compress) for name, entry in entries.items()}
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        # Changes whenever any of the files does
+        "version": hashlib.sha256("".join(entry.hash for entry in entries.values()).encode()).hexdigest()[:NAME_HASH_CHARS],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "storage": server.storage.name,
+        "files": files,
+    }
+    write_atomic(out_dir / MANIFEST_NAME, (json.dumps(manifest, indent=2, ensure_ascii=False) + "\n").encode("utf-8"))
+    for name in files:
+        prune(out_dir, name, keep)
+    return manifest
+
+
+@app.command()
+def export(
+    out_dir: Path = typer.Argument(..., help="Directory to write the snapshot to"),
+    compress: bool = typer.Option(True, help="Also write gzip and brotli variants"),
+    keep: int = typer.Option(3, min=1, help="Versions of each file to keep"),
+):
+    """Write the current public content as a static snapshot."""
+    if server.storage.name == "memory":
+        typer.echo("Warning: STORAGE_BACKEND is memory, so the snapshot will be empty", err=True)
+    manifest = asyncio.run(export_snapshot(out_dir, compress, keep))
+    for name, info in manifest["files"].items():
+        encodings = ", ".join(f"{encoding} {variant['bytes']} B" for encoding, variant in info["encodings"].items())
+        typer.echo(f"{info['path']:<36}{info['bytes']:>10} B" + (f"  ({encodings})" if encodings else ""))
+    typer.echo(f"Snapshot {manifest['version']} written to {out_dir}")
+
+
+@app.command()
+def verify(out_dir: Path = typer.Argument(..., help="Snapshot directory")):
+    """Check that every file in the manifest exists and matches its hash."""
+    manifest = json.loads((out_dir / MANIFEST_NAME).read_text())
+    problems = []
+    for name, info in manifest["files"].items():
+        try:
+            body = (out_dir / info["path"]).read_bytes()
+        except FileNotFoundError:
+            problems.append(f"{name}: {info['path']} is missing")
+            continue
+        if hashlib.sha256(body).hexdigest() != info["sha256"]:
+            problems.append(f"{name}: {info['path']} does not match its hash")
+        for encoding, variant in info["encodings"].items():
+            decompress = DECOMPRESSORS.get(encoding)
+            try:
+                data = (out_dir / variant["path"]).read_bytes()
+            except FileNotFoundError:
+                problems.append(f"{name}: {variant['path']} is missing")
+                continue
+            if decompress is not None and decompress(data) != body:
+                problems.append(f"{name}: {variant['path']} does not decompress to {info['path']}")
+    for problem in problems:
+        typer.echo(problem, err=True)
+    if problems:
+        raise typer.Exit(code=1)
+    typer.echo(f"Snapshot {manifest['version']} is complete")
+
+
+if __name__ == "__main__":
+    app()
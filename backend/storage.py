@@ -0,0 +1,798 @@
+# Storage backends for the API's collections.
+# Every backend hands out one repository per collection with the same
+# interface: the abstract methods of Repository and Storage, while the
+# others are optional hooks with a default. Queries use a small subset of MongoDB filter syntax (equality,
+# $eq/$ne/$lt/$lte/$gt/$gte/$in/$exists, $and/$or) and sorts are lists of
+# (field, direction), so the Mongo backend passes them through unchanged and
+# the in-memory and SQLite backends evaluate them themselves. Documents are
+# plain dicts keyed by their "id" field.
+import asyncio
+import copy
+import json
+import operator
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import OperationFailure
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+Fields = Optional[Sequence[str]]
+Sort = Optional[Sequence[Tuple[str, int]]]
+
+class WatchUnsupported(Exception):
+    # The backend or deployment has no change feed
+    pass
+
+class Repository(ABC):
+    @abstractmethod
+    async def find(self, query: Optional[dict] = None, fields: Fields = None, sort: Sort = None,
+                   limit: Optional[int] = None) -> List[dict]:
+        ...
+
+    @abstractmethod
+    def iterate(self, query: Optional[dict] = None, fields: Fields = None, sort: Sort = None,
+                limit: Optional[int] = None, batch_size: int = 500) -> AsyncIterator[dict]:
+        # Yields matching documents without loading all of them at once
+        ...
+
+    @abstractmethod
+    async def find_one(self, query: dict, fields: Fields = None) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def insert_one(self, document: dict):
+        ...
+
+    @abstractmethod
+    async def insert_many(self, documents: List[dict]):
+        ...
+
+    @abstractmethod
+    async def delete_one(self, query: dict) -> int:
+        ...
+
+    @abstractmethod
+    async def delete_many(self, query: Optional[dict] = None) -> int:
+        ...
+
+    @abstractmethod
+    async def replace_many(self, documents: List[dict]) -> Tuple[int, int]:
+        # Insert or replace by id; returns (inserted, modified)
+        ...
+
+    @abstractmethod
+    async def upsert_many(self, documents: List[dict], keys: Sequence[str], insert_only: Sequence[str] = ()) -> Tuple[int, int]:
+        # Match on keys and update the other fields, except insert_only ones
+        # which are only written when the document is inserted; returns
+        # (inserted, modified)
+        ...
+
+    @abstractmethod
+    async def set_fields(self, updates: List[Tuple[str, dict]]):
+        # (id, fields) pairs
+        ...
+
+    @abstractmethod
+    async def increment(self, field: str, updates: List[Tuple[str, int, dict]]):
+        # (id, amount, fields) triples: adds amount to field, creating the
+        # document from fields when it does not exist yet
+        ...
+
+    @abstractmethod
+    async def count_by(self, field: str) -> Dict[object, int]:
+        ...
+
+    async def ensure_indexes(self, indexes: list) -> List[str]:
+        # pymongo IndexModels; returns the names of the indexes created
+        return []
+
+    async def index_keys(self) -> List[List[Tuple[str, int]]]:
+        return []
+
+    @abstractmethod
+    async def index_stats(self) -> dict:
+        ...
+
+    def pin_primary(self):
+        # Reads should see this process's latest view of the collection for a
+        # while, e.g. after another process reported a change to it
+        pass
+
+class Storage(ABC):
+    name = ""
+    # Whether ensure_indexes has any effect
+    indexed = True
+
+    def __init__(self):
+        self._repositories: Dict[str, Repository] = {}
+
+    @abstractmethod
+    def _open(self, collection: str) -> Repository:
+        ...
+
+    def __getitem__(self, collection: str) -> Repository:
+        repository = self._repositories.get(collection)
+        if repository is None:
+            repository = self._repositories[collection] = self._open(collection)
+        return repository
+
+    def __getattr__(self, collection: str) -> Repository:
+        if collection.startswith("_"):
+            raise AttributeError(collection)
+        return self[collection]
+
+    async def ping(self):
+        # Raises when the backend cannot serve queries
+        pass
+
+    async def watch(self, collections: Sequence[str]) -> AsyncIterator[str]:
+        # Yields None once the feed is open, then the name of each collection
+        # changed by any process
+        raise WatchUnsupported(f"{self.name} storage has no change feed")
+        yield
+
+    @abstractmethod
+    async def drop(self):
+        ...
+
+    def close(self):
+        pass
+
+# MongoDB through Motor
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+def read_preference(mode: str, max_staleness: int = -1):
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+def mongo_projection(fields: Fields) -> dict:
+    return {"_id": 0, **{name: 1 for name in fields or ()}}
+
+class MongoRepository(Repository):
+    # Reads may go to secondaries through `reader`. After a write from this
+    # process they stay on the primary for primary_window seconds, so a cache
+    # refilled right after an edit does not pick up a lagging secondary's copy.
+    def __init__(self, collection, reader=None, primary_window: float = 0.0):
+        self._collection = collection
+        self._reader = reader if reader is not None else collection
+        self._primary_window = primary_window
+        self._primary_until = 0.0
+
+    def _read(self):
+        if self._reader is self._collection or time.monotonic() < self._primary_until:
+            return self._collection
+        return self._reader
+
+    def pin_primary(self):
+        self._primary_until = time.monotonic() + self._primary_window
+
+    def _cursor(self, query, fields, sort, limit, **kwargs):
+        cursor = self._read().find(query or {}, mongo_projection(fields), **kwargs)
+        if sort:
+            cursor = cursor.sort(list(sort))
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+
+    async def find(self, query=None, fields=None, sort=None, limit=None):
+        return await self._cursor(query, fields, sort, limit).to_list(length=None)
+
+    def iterate(self, query=None, fields=None, sort=None, limit=None, batch_size=500):
+        return self._cursor(query, fields, sort, limit, batch_size=batch_size)
+
+    async def find_one(self, query, fields=None):
+        return await self._read().find_one(query, mongo_projection(fields))
+
+    # Copies keep the ObjectId pymongo adds on insert out of the caller's dicts
+    async def insert_one(self, document):
+        await self._collection.insert_one(dict(document))
+        self.pin_primary()
+
+    async def insert_many(self, documents):
+        try:
+            await self._collection.insert_many([dict(document) for document in documents], ordered=False)
+        finally:
+            self.pin_primary()
+
+    async def delete_one(self, query):
+        result = await self._collection.delete_one(query)
+        self.pin_primary()
+        return result.deleted_count
+
+    async def delete_many(self, query=None):
+        result = await self._collection.delete_many(query or {})
+        self.pin_primary()
+        return result.deleted_count
+
+    async def replace_many(self, documents):
+        if not documents:
+            return 0, 0
+        operations = [ReplaceOne({"id": document["id"]}, document, upsert=True) for document in documents]
+        result = await self._collection.bulk_write(operations, ordered=False)
+        self.pin_primary()
+        return result.upserted_count, result.modified_count
+
+    async def upsert_many(self, documents, keys, insert_only=()):
+        if not documents:
+            return 0, 0
+        operations = []
+        for document in documents:
+            key = {field: document[field] for field in keys}
+            update = {"$set": {name: value for name, value in document.items() if name not in insert_only}}
+            on_insert = {name: document[name] for name in insert_only if name in document}
+            if on_insert:
+                update["$setOnInsert"] = on_insert
+            operations.append(UpdateOne(key, update, upsert=True))
+        result = await self._collection.bulk_write(operations, ordered=False)
+        self.pin_primary()
+        return result.upserted_count, result.modified_count
+
+    async def set_fields(self, updates):
+        if updates:
+            operations = [UpdateOne({"id": document_id}, {"$set": fields}) for document_id, fields in updates]
+            await self._collection.bulk_write(operations, ordered=False)
+            self.pin_primary()
+
+    async def increment(self, field, updates):
+        if updates:
+            operations = [
+                UpdateOne({"id": document_id}, {"$inc": {field: amount}, "$setOnInsert": fields}, upsert=True)
+                for document_id, amount, fields in updates
+            ]
+            await self._collection.bulk_write(operations, ordered=False)
+            self.pin_primary()
+
+    async def count_by(self, field):
+        pipeline = [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+        return {bucket["_id"]: bucket["count"] async for bucket in self._read().aggregate(pipeline)}
+
+    async def ensure_indexes(self, indexes):
+        existing = {index["name"] async for index in self._collection.list_indexes()}
+        missing = [index for index in indexes if index.document["name"] not in existing]
+        if not missing:
+            return []
+        return await self._collection.create_indexes(missing)
+
+    async def index_keys(self):
+        return [list(index["key"].items()) async for index in self._collection.list_indexes()]
+
+    async def index_stats(self):
+        stats = await self._collection.database.command("collStats", self._collection.name)
+        usage = {
+            entry["name"]: {"ops": entry["accesses"]["ops"], "since": entry["accesses"]["since"]}
+            async for entry in self._collection.aggregate([{"$indexStats": {}}])
+        }
+        return {
+            "count": stats.get("count", 0),
+            "total_index_size": stats.get("totalIndexSize", 0),
+            "indexes": [
+                {
+                    "name": name,
+                    "size": size,
+                    "ops": usage.get(name, {}).get("ops", 0),
+                    "since": usage.get(name, {}).get("since"),
+                }
+                for name, size in stats.get("indexSizes", {}).items()
+            ],
+        }
+
+class MongoStorage(Storage):
+    name = "mongo"
+
+    # Writes always go to the primary. Reads of secondary_collections use
+    # read_preference; all other collections are read from the primary too.
+    def __init__(self, url: str, db_name: str, read_preference=None, secondary_collections=(),
+                 primary_window: float = 0.0, **client_options):
+        super().__init__()
+        self.client = AsyncIOMotorClient(url, **client_options)
+        self.db = self.client[db_name]
+        self.read_preference = read_preference
+        self.secondary_collections = frozenset(secondary_collections)
+        self.primary_window = primary_window
+
+    def _open(self, collection):
+        primary = self.db.get_collection(collection, read_preference=Primary())
+        reader = None
+        if self.read_preference is not None and collection in self.secondary_collections:
+            reader = self.db.get_collection(collection, read_preference=self.read_preference)
+        return MongoRepository(primary, reader, self.primary_window)
+
+    async def ping(self):
+        await self.client.admin.command("ping")
+
+    async def watch(self, collections):
+        # Change streams need a replica set or a sharded cluster
+        pipeline = [{"$match": {"ns.coll": {"$in": list(collections)}}}, {"$project": {"ns": 1}}]
+        try:
+            async with self.db.watch(pipeline) as stream:
+                yield None
+                async for change in stream:
+                    collection = change.get("ns", {}).get("coll")
+                    # Database drops and stream invalidations name no collection
+                    for name in [collection] if collection else collections:
+                        yield name
+        except OperationFailure as e:
+            if e.code == 40573:
+                raise WatchUnsupported(str(e)) from e
+            raise
+
+    async def drop(self):
+        await self.client.drop_database(self.db.name)
+
+    def close(self):
+        self.client.close()
+
+# Shared query evaluation for the embedded backends
+
+FIELD_NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+COMPARISONS = {"$lt": operator.lt, "$lte": operator.le, "$gt": operator.gt, "$gte": operator.ge}
+_MISSING = object()
+
+def _check_field(field: str) -> str:
+    if not FIELD_NAME_PATTERN.fullmatch(field):
+        raise ValueError(f"Unsupported field name: {field!r}")
+    return field
+
+def _is_operator_condition(condition) -> bool:
+    return isinstance(condition, dict) and any(key.startswith("$") for key in condition)
+
+def _test(value, op: str, operand) -> bool:
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if value is _MISSING:
+        value = None
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op not in COMPARISONS:
+        raise ValueError(f"Unsupported query operator: {op}")
+    # Like MongoDB, range operators never match null or another type
+    if value is None:
+        return False
+    try:
+        return COMPARISONS[op](value, operand)
+    except TypeError:
+        return False
+
+def matches(document: dict, query: Optional[dict]) -> bool:
+    for field, condition in (query or {}).items():
+        if field == "$and":
+            if not all(matches(document, part) for part in condition):
+                return False
+        elif field == "$or":
+            if not any(matches(document, part) for part in condition):
+                return False
+        elif _is_operator_condition(condition):
+            value = document.get(field, _MISSING)
+            if not all(_test(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif document.get(field) != condition:
+            return False
+    return True
+
+def _sort_key(value):
+    # MongoDB's cross-type order: null, numbers, strings, everything else
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, json.dumps(value, sort_keys=True, default=str))
+
+def sort_documents(documents: List[dict], sort: Sort) -> List[dict]:
+    # Stable sorts from the last key to the first
+    for field, direction in reversed(list(sort or ())):
+        documents.sort(key=lambda document: _sort_key(document.get(field)), reverse=direction < 0)
+    return documents
+
+def project(document: dict, fields: Fields) -> dict:
+    if fields is None:
+        return copy.deepcopy(document)
+    return {name: copy.deepcopy(document[name]) for name in fields if name in document}
+
+# In-memory backend: one list per collection, lost on restart
+
+class MemoryRepository(Repository):
+    def __init__(self):
+        self._documents: List[dict] = []
+
+    def _select(self, query, sort, limit) -> List[dict]:
+        selected = [document for document in self._documents if matches(document, query)]
+        sort_documents(selected, sort)
+        return selected[:limit] if limit else selected
+
+    def _find_by(self, query) -> Optional[dict]:
+        return next((document for document in self._documents if matches(document, query)), None)
+
+    async def find(self, query=None, fields=None, sort=None, limit=None):
+        return [project(document, fields) for document in self._select(query, sort, limit)]
+
+    async def iterate(self, query=None, fields=None, sort=None, limit=None, batch_size=500):
+        for document in self._select(query, sort, limit):
+            yield project(document, fields)
+
+    async def find_one(self, query, fields=None):
+        document = self._find_by(query)
+        return None if document is None else project(document, fields)
+
+    async def insert_one(self, document):
+        self._documents.append(copy.deepcopy(document))
+
+    async def insert_many(self, documents):
+        self._documents.extend(copy.deepcopy(document) for document in documents)
+
+    async def delete_one(self, query):
+        document = self._find_by(query)
+        if document is None:
+            return 0
+        self._documents.remove(document)
+        return 1
+
+    async def delete_many(self, query=None):
+        kept = [document for document in self._documents if not matches(document, query)]
+        deleted = len(self._documents) - len(kept)
+        self._documents = kept
+        return deleted
+
+    def _update(self, document: dict, fields: dict) -> bool:
+        if all(name in document and document[name] == value for name, value in fields.items()):
+            return False
+        document.update(copy.deepcopy(fields))
+        return True
+
+    async def replace_many(self, documents):
+        inserted = modified = 0
+        for document in documents:
+            existing = self._find_by({"id": document["id"]})
+            if existing is None:
+                self._documents.append(copy.deepcopy(document))
+                inserted += 1
+            elif existing != document:
+                existing.clear()
+                existing.update(copy.deepcopy(document))
+                modified += 1
+        return inserted, modified
+
+    async def upsert_many(self, documents, keys, insert_only=()):
+        inserted = modified = 0
+        for document in documents:
+            existing = self._find_by({field: document[field] for field in keys})
+            if existing is None:
+                self._documents.append(copy.deepcopy(document))
+                inserted += 1
+            elif self._update(existing, {name: value for name, value in document.items() if name not in insert_only}):
+                modified += 1
+        return inserted, modified
+
+    async def set_fields(self, updates):
+        for document_id, fields in updates:
+            existing = self._find_by({"id": document_id})
+            if existing is not None:
+                self._update(existing, fields)
+
+    async def increment(self, field, updates):
+        for document_id, amount, fields in updates:
+            existing = self._find_by({"id": document_id})
+            if existing is None:
+                self._documents.append(copy.deepcopy({**fields, "id": document_id, field: amount}))
+            else:
+                existing[field] = existing.get(field, 0) + amount
+
+    async def count_by(self, field):
+        counts = {}
+        for document in self._documents:
+            value = document.get(field)
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    async def index_stats(self):
+        return {"count": len(self._documents), "total_index_size": 0, "indexes": []}
+
+class MemoryStorage(Storage):
+    name = "memory"
+    indexed = False
+
+    def _open(self, collection):
+        return MemoryRepository()
+
+    async def drop(self):
+        self._repositories.clear()
+
+# Embedded SQLite backend: one table per collection holding JSON documents.
+# Filters and sorts compile to json_extract() expressions with literal paths,
+# so the expression indexes created by ensure_indexes can serve them. Calls
+# run in worker threads, one at a time on a shared connection.
+
+def _column(field: str) -> str:
+    return f"json_extract(document, '$.{_check_field(field)}')"
+
+def _sql_condition(field: str, op: str, operand, params: list) -> str:
+    column = _column(field)
+    if op == "$exists":
+        return f"json_type(document, '$.{field}') IS {'NOT ' if operand else ''}NULL"
+    if op in ("$eq", "$ne") and operand is None:
+        # Like MongoDB, null also matches a missing field
+        return f"{column} IS {'NOT ' if op == '$ne' else ''}NULL"
+    if isinstance(operand, (dict, list)) and op != "$in":
+        raise ValueError(f"Unsupported operand for {field}: {operand!r}")
+    if op == "$eq":
+        params.append(operand)
+        return f"{column} = ?"
+    if op == "$ne":
+        params.append(operand)
+        return f"({column} IS NULL OR {column} != ?)"
+    if op == "$in":
+        if not operand:
+            return "0"
+        params.extend(operand)
+        return f"{column} IN ({', '.join('?' for _ in operand)})"
+    sql_operators = {"$lt": "<", "$lte": "<=", "$gt": ">", "$gte": ">="}
+    if op not in sql_operators:
+        raise ValueError(f"Unsupported query operator: {op}")
+    params.append(operand)
+    return f"{column} {sql_operators[op]} ?"
+
+def sql_where(query: Optional[dict], params: list) -> str:
+    clauses = []
+    for field, condition in (query or {}).items():
+        if field in ("$and", "$or"):
+            parts = [f"({sql_where(part, params)})" for part in condition]
+            clauses.append("(" + (" AND " if field == "$and" else " OR ").join(parts or ["1"]) + ")")
+        elif _is_operator_condition(condition):
+            clauses.extend(_sql_condition(field, op, operand, params) for op, operand in condition.items())
+        else:
+            clauses.append(_sql_condition(field, "$eq", condition, params))
+    return " AND ".join(clauses) or "1"
+
+def sql_order_by(sort: Sort) -> str:
+    # rowid keeps insertion order for ties, like MongoDB's natural order
+    terms = [f"{_column(field)} {'DESC' if direction < 0 else 'ASC'}" for field, direction in sort or ()]
+    return ", ".join(terms + ["rowid"])
+
+def _dump(document: dict) -> str:
+    return json.dumps(document, ensure_ascii=False, default=str)
+
+class SQLiteRepository(Repository):
+    def __init__(self, storage: "SQLiteStorage", table: str):
+        self._storage = storage
+        self._table = _check_field(table)
+        self._indexes: List[List[Tuple[str, int]]] = [[("id", 1)]]
+        storage.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (id TEXT PRIMARY KEY, document TEXT NOT NULL)')
+
+    def _select_sql(self, query, sort, limit, params: list) -> str:
+        sql = f'SELECT document FROM "{self._table}" WHERE {sql_where(query, params)} ORDER BY {sql_order_by(sort)}'
+        if limit:
+            params.append(limit)
+            sql += " LIMIT ?"
+        return sql
+
+    async def find(self, query=None, fields=None, sort=None, limit=None):
+        params = []
+        sql = self._select_sql(query, sort, limit, params)
+        rows = await self._storage.run(lambda connection: connection.execute(sql, params).fetchall())
+        return [project(json.loads(document), fields) for document, in rows]
+
+    async def iterate(self, query=None, fields=None, sort=None, limit=None, batch_size=500):
+        params = []
+        sql = self._select_sql(query, sort, limit, params)
+        cursor = await self._storage.run(lambda connection: connection.execute(sql, params))
+        try:
+            while True:
+                rows = await self._storage.run(lambda connection: cursor.fetchmany(batch_size))
+                if not rows:
+                    break
+                for document, in rows:
+                    yield project(json.loads(document), fields)
+        finally:
+            await self._storage.run(lambda connection: cursor.close())
+
+    async def find_one(self, query, fields=None):
+        documents = await self.find(query, fields, limit=1)
+        return documents[0] if documents else None
+
+    def _insert(self, connection, documents):
+        connection.executemany(
+            f'INSERT INTO "{self._table}" (id, document) VALUES (?, ?)',
+            [(document["id"], _dump(document)) for document in documents],
+        )
+
+    async def insert_one(self, document):
+        await self._storage.transaction(lambda connection: self._insert(connection, [document]))
+
+    async def insert_many(self, documents):
+        await self._storage.transaction(lambda connection: self._insert(connection, documents))
+
+    async def delete_one(self, query):
+        params = []
+        sql = f'DELETE FROM "{self._table}" WHERE rowid = (SELECT rowid FROM "{self._table}" WHERE {sql_where(query, params)} LIMIT 1)'
+        return await self._storage.transaction(lambda connection: connection.execute(sql, params).rowcount)
+
+    async def delete_many(self, query=None):
+        params = []
+        sql = f'DELETE FROM "{self._table}" WHERE {sql_where(query, params)}'
+        return await self._storage.transaction(lambda connection: connection.execute(sql, params).rowcount)
+
+    def _load(self, connection, query) -> Tuple[Optional[str], Optional[dict]]:
+        params = []
+        row = connection.execute(
+            f'SELECT id, document FROM "{self._table}" WHERE {sql_where(query, params)} ORDER BY rowid LIMIT 1', params,
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else (None, None)
+
+    def _store(self, connection, row_id: str, document: dict):
+        connection.execute(f'UPDATE "{self._table}" SET id = ?, document = ? WHERE id = ?', (document["id"], _dump(document), row_id))
+
+    async def replace_many(self, documents):
+        def replace(connection):
+            inserted = modified = 0
+            for document in documents:
+                row_id, existing = self._load(connection, {"id": document["id"]})
+                if existing is None:
+                    self._insert(connection, [document])
+                    inserted += 1
+                elif existing != json.loads(_dump(document)):
+                    self._store(connection, row_id, document)
+                    modified += 1
+            return inserted, modified
+
+        return await self._storage.transaction(replace)
+
+    async def upsert_many(self, documents, keys, insert_only=()):
+        def upsert(connection):
+            inserted = modified = 0
+            for document in documents:
+                row_id, existing = self._load(connection, {field: document[field] for field in keys})
+                if existing is None:
+                    self._insert(connection, [document])
+                    inserted += 1
+                    continue
+                updated = {**existing, **{name: value for name, value in document.items() if name not in insert_only}}
+                if json.loads(_dump(updated)) != existing:
+                    self._store(connection, row_id, updated)
+                    modified += 1
+            return inserted, modified
+
+        return await self._storage.transaction(upsert)
+
+    async def set_fields(self, updates):
+        def update(connection):
+            for document_id, fields in updates:
+                row_id, existing = self._load(connection, {"id": document_id})
+                if existing is not None:
+                    self._store(connection, row_id, {**existing, **fields})
+
+        await self._storage.transaction(update)
+
+    async def increment(self, field, updates):
+        def update(connection):
+            for document_id, amount, fields in updates:
+                row_id, existing = self._load(connection, {"id": document_id})
+                if existing is None:
+                    self._insert(connection, [{**fields, "id": document_id, field: amount}])
+                else:
+                    self._store(connection, row_id, {**existing, field: existing.get(field, 0) + amount})
+
+        await self._storage.transaction(update)
+
+    async def count_by(self, field):
+        sql = f'SELECT {_column(field)} AS value, COUNT(*) FROM "{self._table}" GROUP BY value'
+        rows = await self._storage.run(lambda connection: connection.execute(sql).fetchall())
+        return dict(rows)
+
+    async def ensure_indexes(self, indexes):
+        def create(connection):
+            existing = {name for name, in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (self._table,),
+            )}
+            created = []
+            for index in indexes:
+                keys = list(index.document["key"].items())
+                if keys == [("id", 1)]:
+                    continue  # The primary key
+                name = f"{self._table}_{_check_field(index.document['name'])}"
+                if name not in existing:
+                    columns = ", ".join(f"{_column(field)} {'DESC' if direction < 0 else 'ASC'}" for field, direction in keys)
+                    unique = "UNIQUE " if index.document.get("unique") else ""
+                    connection.execute(f'CREATE {unique}INDEX "{name}" ON "{self._table}" ({columns})')
+                    created.append(index.document["name"])
+                if keys not in self._indexes:
+                    self._indexes.append(keys)
+            return created
+
+        return await self._storage.transaction(create)
+
+    async def index_keys(self):
+        return list(self._indexes)
+
+    async def index_stats(self):
+        def stats(connection):
+            count = connection.execute(f'SELECT COUNT(*) FROM "{self._table}"').fetchone()[0]
+            names = [name for name, in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (self._table,),
+            )]
+            try:
+                sizes = dict(connection.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+            except sqlite3.OperationalError:  # Built without the dbstat table
+                sizes = {}
+            return {
+                "count": count,
+                "total_index_size": sum(sizes.get(name, 0) for name in names),
+                "indexes": [{"name": name, "size": sizes.get(name), "ops": None, "since": None} for name in names],
+            }
+
+        return await self._storage.run(stats)
+
+class SQLiteStorage(Storage):
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+
+    def _open(self, collection):
+        return SQLiteRepository(self, collection)
+
+    async def ping(self):
+        await self.run(lambda connection: connection.execute("SELECT 1").fetchone())
+
+    def execute(self, sql: str, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params)
+
+    def _locked(self, function):
+        with self._lock:
+            return function(self._connection)
+
+    def _transaction(self, function):
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = function(self._connection)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return result
+
+    async def run(self, function):
+        return await asyncio.to_thread(self._locked, function)
+
+    async def transaction(self, function):
+        return await asyncio.to_thread(self._transaction, function)
+
+    async def drop(self):
+        def drop_tables(connection):
+            tables = [name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            for table in tables:
+                connection.execute(f'DROP TABLE "{table}"')
+
+        await self.transaction(drop_tables)
+        self._repositories.clear()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
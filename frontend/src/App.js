@@ -5,6 +5,76 @@ import "./App.css";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+// Static snapshot written by backend/snapshot.py; the API is the fallback
+const SNAPSHOT_URL = process.env.REACT_APP_SNAPSHOT_URL;
+
+// Id of the last change event, derived from the content itself and the same
+// on every API worker. Sent as a query parameter so refetches after a change
+// miss the browser's HTTP cache (the API allows max-age=60)
+let contentVersion = null;
+
+const fetchContent = (url) => axios.get(url, { params: contentVersion ? { v: contentVersion } : {} })
+  .then(response => response.data);
+
+// All public content is loaded in one request and shared by every page
+let bundlePromise = null;
+const fetchBundle = () => {
+  if (!bundlePromise) {
+    // After a change the snapshot is behind the API
+    const request = SNAPSHOT_URL && !contentVersion
+      ? fetchContent(`${SNAPSHOT_URL}/bundle.json`).catch(() => fetchContent(`${API}/bundle`))
+      : fetchContent(`${API}/bundle`);
+    bundlePromise = request
+      .catch(error => {
+        bundlePromise = null;
+        throw error;
+      });
+  }
+  return bundlePromise;
+};
+
+// Live updates: the API announces over Server-Sent Events which content
+// changed; each changed list that a page shows is fetched once from its own
+// endpoint (/api/cities, /api/history, /api/culture) and handed to the pages
+const contentSubscribers = new Set();
+let contentEvents = null;
+
+const refreshContent = (resources, version) => {
+  contentVersion = version;
+  bundlePromise = null;
+  resources.forEach(resource => {
+    const subscribers = [...contentSubscribers].filter(subscriber => subscriber.resource === resource);
+    if (subscribers.length === 0) {
+      return;
+    }
+    fetchContent(`${API}/${resource}`)
+      .then(data => subscribers.forEach(subscriber => subscriber.callback(data)))
+      .catch(error => console.error(`Error refreshing ${resource}:`, error));
+  });
+};
+
+const subscribeToContent = (resource, callback) => {
+  const subscriber = { resource, callback };
+  contentSubscribers.add(subscriber);
+  // One connection for the whole app; EventSource reconnects by itself
+  if (!contentEvents && typeof EventSource !== 'undefined') {
+    contentEvents = new EventSource(`${API}/events`);
+    contentEvents.addEventListener('change', event => refreshContent([JSON.parse(event.data).resource], event.lastEventId));
+    contentEvents.addEventListener('reset', event => refreshContent(JSON.parse(event.data).resources, event.lastEventId));
+  }
+  return () => contentSubscribers.delete(subscriber);
+};
+
+// View counts for the popular ranking. sendBeacon posts text/plain, which
+// needs no CORS preflight, and is not cancelled when the page is left
+const recordView = (cityId, attraction) => {
+  const body = JSON.stringify({ city_id: cityId, attraction });
+  if (navigator.sendBeacon) {
+    navigator.sendBeacon(`${API}/views`, body);
+  } else {
+    axios.post(`${API}/views`, body, { headers: { 'Content-Type': 'text/plain' } }).catch(() => {});
+  }
+};
 
 // Navigation Component with new color scheme
 const Navigation = () => {
@@ -99,12 +169,13 @@ const HomePage = () => {
 
   useEffect(() => {
     fetchCities();
+    return subscribeToContent('cities', setCities);
   }, []);
 
   const fetchCities = async () => {
     try {
-      const response = await axios.get(`${API}/cities`);
-      setCities(response.data);
+      const bundle = await fetchBundle();
+      setCities(bundle.cities);
     } catch (error) {
       console.error('Error fetching cities:', error);
     }
@@ -245,6 +316,7 @@ const HistoryPage = () => {
 
   useEffect(() => {
     fetchHistory();
+    return subscribeToContent('history', showHistory);
   }, []);
 
   useEffect(() => {
@@ -256,11 +328,15 @@ const HistoryPage = () => {
     });
   }, [historyEvents]);
 
+  const showHistory = (events) => {
+    setHistoryEvents(events);
+    setVisibleEvents([]); // Reset visible events
+  };
+
   const fetchHistory = async () => {
     try {
-      const response = await axios.get(`${API}/history`);
-      setHistoryEvents(response.data);
-      setVisibleEvents([]); // Reset visible events
+      const bundle = await fetchBundle();
+      showHistory(bundle.history);
     } catch (error) {
       console.error('Error fetching history:', error);
     }
@@ -323,12 +399,13 @@ const AttractionsPage = () => {
 
   useEffect(() => {
     fetchCities();
+    return subscribeToContent('cities', setCities);
   }, []);
 
   const fetchCities = async () => {
     try {
-      const response = await axios.get(`${API}/cities`);
-      setCities(response.data);
+      const bundle = await fetchBundle();
+      setCities(bundle.cities);
     } catch (error) {
       console.error('Error fetching cities:', error);
     }
@@ -353,7 +430,14 @@ const AttractionsPage = () => {
             <div 
               key={city.id} 
               className="group cursor-pointer bg-card rounded-2xl border border-accent/20 hover:border-accent/40 transition-all duration-300 hover:transform hover:scale-105 backdrop-blur-sm overflow-hidden"
-              onClick={() => setSelectedCity(selectedCity?.id === city.id ? null : city)}
+              onClick={() => {
+                if (selectedCity?.id === city.id) {
+                  setSelectedCity(null);
+                } else {
+                  setSelectedCity(city);
+                  recordView(city.id);
+                }
+              }}
             >
               {city.image_url && (
                 <div className="h-48 overflow-hidden rounded-t-2xl">
@@ -414,12 +498,13 @@ const CulturePage = () => {
 
   useEffect(() => {
     fetchCulture();
+    return subscribeToContent('culture', setCultureItems);
   }, []);
 
   const fetchCulture = async () => {
     try {
-      const response = await axios.get(`${API}/culture`);
-      setCultureItems(response.data);
+      const bundle = await fetchBundle();
+      setCultureItems(bundle.culture);
     } catch (error) {
       console.error('Error fetching culture items:', error);
     }
@@ -436,6 +521,13 @@ const CulturePage = () => {
     ? cultureItems 
     : cultureItems.filter(item => item.category === selectedCategory);
 
+  const categoryCount = (value) => {
+    if (cultureItems.length === 0) return null;
+    return value === 'all'
+      ? cultureItems.length
+      : cultureItems.filter(item => item.category === value).length;
+  };
+
   return (
     <div className="min-h-screen bg-primary py-12">
       <div className="max-w-6xl mx-auto px-4">
@@ -463,6 +555,9 @@ const CulturePage = () => {
             >
               <span className="mr-2">{category.icon}</span>
               {category.label}
+              {categoryCount(category.value) != null && (
+                <span className="ml-2 text-sm opacity-75">{categoryCount(category.value)}</span>
+              )}
             </button>
           ))}
         </div>
@@ -834,6 +929,7 @@ const AdminPage = () => {
       await axios.post(`${API}/init-data`, {}, {
         headers: { 'Authorization': `Basic ${auth}` }
       });
+      bundlePromise = null;
       alert('Данные с городской структурой успешно загружены!');
     } catch (error) {
       console.error('Error initializing data:', error);
@@ -849,6 +945,7 @@ const AdminPage = () => {
         await axios.post(`${API}/clear-data`, {}, {
           headers: { 'Authorization': `Basic ${auth}` }
         });
+        bundlePromise = null;
         alert('Все данные очищены!');
       } catch (error) {
         console.error('Error clearing data:', error);
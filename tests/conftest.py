@@ -0,0 +1,20 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The API modules live in backend/ and are imported by name, as uvicorn does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    # Fresh in-memory storage in place of the API's
+    import server
+    from storage import MemoryStorage
+
+    storage = MemoryStorage()
+    monkeypatch.setattr(server, "storage", storage)
+    return storage
@@ -0,0 +1,77 @@
+"""
+Rate limits and duplicate suppression for the public contact form and the
+view beacon, keyed by client address.
+"""
+
+import pytest
+from starlette.requests import Request
+
+import server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_allows_burst_then_refills(clock):
+    limiter = server.TokenBucketLimiter(rate_per_minute=6, burst=2)
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == pytest.approx(10)
+    # Other clients have their own bucket
+    assert limiter.acquire("b") == 0
+    clock[0] += 10
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+
+
+def test_token_bucket_forgets_least_recent_clients(clock):
+    limiter = server.TokenBucketLimiter(rate_per_minute=1, burst=1, max_keys=2)
+    limiter.acquire("a")
+    limiter.acquire("b")
+    limiter.acquire("a")
+    limiter.acquire("c")
+    # "a" is still empty, "b" was evicted and starts over with a full bucket
+    assert limiter.acquire("a") > 0
+    assert limiter.acquire("b") == 0
+
+
+def test_recent_messages_expire_after_window(clock):
+    recent = server.RecentMessages(window=60)
+    data = server.ContactMessageCreate(name="Anna", email="Anna@Example.com", message="Hello   there")
+    message = server.ContactMessage(**data.dict())
+    fingerprint = server.RecentMessages.fingerprint(data)
+    recent.add(fingerprint, message)
+    # Case and whitespace do not make a message new
+    same = server.ContactMessageCreate(name=" anna", email="anna@example.com", message="hello there")
+    assert recent.get(server.RecentMessages.fingerprint(same)) is message
+    clock[0] += 61
+    assert recent.get(fingerprint) is None
+
+
+def request_from(peer: str, *forwarded: str) -> Request:
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+@pytest.mark.parametrize("hops, forwarded, expected", [
+    (1, ["203.0.113.7"], "203.0.113.7"),
+    # A client-supplied entry ahead of the proxy's does not change the key
+    (1, ["1.2.3.4, 203.0.113.7"], "203.0.113.7"),
+    (1, ["1.2.3.4", "203.0.113.7"], "203.0.113.7"),
+    (2, ["1.2.3.4, 203.0.113.7, 10.0.0.2"], "203.0.113.7"),
+    (2, ["203.0.113.7"], "203.0.113.7"),
+    (1, [], "10.0.0.1"),
+])
+def test_client_ip_uses_address_added_by_trusted_proxy(monkeypatch, hops, forwarded, expected):
+    monkeypatch.setattr(server, "TRUST_PROXY_HEADERS", True)
+    monkeypatch.setattr(server, "TRUSTED_PROXY_HOPS", hops)
+    assert server.client_ip(request_from("10.0.0.1", *forwarded)) == expected
+
+
+def test_client_ip_ignores_forwarded_header_unless_trusted(monkeypatch):
+    monkeypatch.setattr(server, "TRUST_PROXY_HEADERS", False)
+    assert server.client_ip(request_from("10.0.0.1", "203.0.113.7")) == "10.0.0.1"
@@ -0,0 +1,95 @@
+"""
+Cached bodies are compressed once per encoding and served to clients that
+accept it, with a validator per representation.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import server
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=oops", None),
+    ("identity", None),
+    ("*", "gzip"),
+    ("*;q=0.5, gzip;q=0", None),
+])
+def test_negotiate_encoding_gzip(monkeypatch, accept_encoding, expected):
+    monkeypatch.delitem(server.COMPRESSORS, "br", raising=False)
+    assert server.negotiate_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+])
+def test_negotiate_encoding_prefers_brotli(accept_encoding, expected):
+    if "br" not in server.COMPRESSORS:
+        pytest.skip("brotli is not installed")
+    assert server.negotiate_encoding(accept_encoding) == expected
+
+
+def test_large_body_is_served_compressed(storage, monkeypatch):
+    monkeypatch.setattr(server, "content_cache", server.ContentCache(server.CONTENT_COLLECTIONS))
+    monkeypatch.delitem(server.COMPRESSORS, "br", raising=False)
+
+    async def scenario():
+        await storage.culture_items.insert_many([
+            {"id": f"c{index}", "title": f"Craft {index}", "description": "Painted wood " * 20, "category": "craft"}
+            for index in range(20)
+        ])
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            plain = await client.get("/api/culture", headers={"Accept-Encoding": "identity"})
+            compressed = await client.get("/api/culture", headers={"Accept-Encoding": "gzip"})
+            revalidated = await client.get(
+                "/api/culture", headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]},
+            )
+        return plain, compressed, revalidated
+
+    plain, compressed, revalidated = asyncio.run(scenario())
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    # httpx has decoded the body already
+    assert compressed.content == plain.content
+    assert compressed.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert revalidated.status_code == 304
+
+
+def test_cancelled_request_does_not_poison_compressed_variant():
+    async def scenario():
+        entry = server.CachedBody(0, b"[" + b'{"name":"city"},' * 1000 + b"{}]")
+        request = asyncio.ensure_future(entry.encoded("gzip"))
+        await asyncio.sleep(0)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        return entry.body, await entry.encoded("gzip")
+
+    body, compressed = asyncio.run(scenario())
+    assert server.gzip.decompress(compressed) == body
+
+
+def test_failed_compression_is_retried(monkeypatch):
+    async def scenario():
+        entry = server.CachedBody(0, b"x" * 2048)
+        monkeypatch.setitem(server.COMPRESSORS, "gzip", lambda body: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            await entry.encoded("gzip")
+        monkeypatch.setitem(server.COMPRESSORS, "gzip", server.gzip.compress)
+        await asyncio.sleep(0)
+        return await entry.encoded("gzip")
+
+    assert server.gzip.decompress(asyncio.run(scenario())) == b"x" * 2048
+
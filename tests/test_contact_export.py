@@ -0,0 +1,64 @@
+"""
+Contact messages are exported as CSV for spreadsheets and as Parquet,
+with visitor-supplied text never evaluated as a formula.
+"""
+
+import asyncio
+import csv
+import io
+
+import httpx
+import pytest
+
+import server
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("=HYPERLINK(\"http://evil\")", "'=HYPERLINK(\"http://evil\")"),
+    ("+79001234567", "'+79001234567"),
+    ("-1", "'-1"),
+    ("@SUM(A1)", "'@SUM(A1)"),
+    ("\tTab", "'\tTab"),
+    ("\rReturn", "'\rReturn"),
+    ("Hello = world", "Hello = world"),
+    ("", ""),
+    (None, None),
+    (5, 5),
+])
+def test_escape_formula(value, expected):
+    assert server.escape_formula(value) == expected
+
+
+def contact(index: int, message: str) -> dict:
+    return {
+        "id": f"m{index}", "name": f"Visitor {index}", "email": "visitor@example.com",
+        "message": message, "created_at": f"2024-01-0{index}T10:00:00+00:00",
+    }
+
+
+def export(storage, export_format: str) -> httpx.Response:
+    async def scenario():
+        await storage.contact_messages.insert_many([contact(1, "=1+1"), contact(2, "Привет, мир")])
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", auth=("admin", "admin123")) as client:
+            return await client.get("/api/contact/export", params={"format": export_format})
+
+    return asyncio.run(scenario())
+
+
+def test_csv_export(storage):
+    response = export(storage, "csv")
+    assert response.status_code == 200
+    text = response.content.decode("utf-8")
+    assert text.startswith("\ufeff")
+    rows = list(csv.DictReader(io.StringIO(text.lstrip("\ufeff"))))
+    assert [(row["id"], row["message"]) for row in rows] == [("m2", "Привет, мир"), ("m1", "'=1+1")]
+
+
+def test_parquet_export_keeps_values(storage):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    response = export(storage, "parquet")
+    assert response.status_code == 200
+    table = pyarrow_parquet.read_table(io.BytesIO(response.content))
+    assert table.column("message").to_pylist() == ["Привет, мир", "=1+1"]
+    assert str(table.schema.field("created_at").type) == "timestamp[us, tz=UTC]"
@@ -0,0 +1,190 @@
+"""
+The contact pipeline answers a submission before storing it, so nothing
+accepted may be lost: not on failing writes, not on shutdown, and not when
+notifications or their dead letters fail.
+"""
+
+import asyncio
+import email
+import socket
+from email.header import decode_header, make_header
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def pipeline_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "CONTACT_SPOOL_DIR", tmp_path / "spool")
+    monkeypatch.setattr(server, "CONTACT_BATCH_INTERVAL", 0.01)
+    monkeypatch.setattr(server, "CONTACT_WRITE_BACKOFF_SECONDS", 0.01)
+    monkeypatch.setattr(server, "PIPELINE_DRAIN_SECONDS", 0.2)
+    monkeypatch.setattr(server, "EMAIL_BACKOFF_SECONDS", 0.01)
+    sent = []
+
+    async def record_email(message):
+        sent.append(message.id)
+
+    monkeypatch.setattr(server, "send_email_notification", record_email)
+    return sent
+
+
+def contact(index: int = 0) -> server.ContactMessage:
+    return server.ContactMessage(name=f"Anna {index}", email="anna@example.com", message=f"Secret text {index}")
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_notification_reaches_smtp_stand_in(monkeypatch):
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    received = []
+
+    class Handler:
+        async def handle_DATA(self, server_, session, envelope):
+            received.append(envelope)
+            return "250 OK"
+
+    # The controller probes its own port once started, so it cannot bind port 0
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    controller = controller_module.Controller(Handler(), hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        monkeypatch.setattr(server, "SMTP_HOST", "127.0.0.1")
+        monkeypatch.setattr(server, "SMTP_PORT", port)
+        monkeypatch.setattr(server, "SMTP_STARTTLS", False)
+        message = server.ContactMessage(name="Анна", email="anna@example.com", message="Здравствуйте!")
+        asyncio.run(server.send_email_notification(message))
+    finally:
+        controller.stop()
+
+    assert len(received) == 1
+    assert received[0].rcpt_tos == [server.CONTACT_NOTIFY_EMAIL]
+    mime = email.message_from_bytes(received[0].content)
+    assert str(make_header(decode_header(mime["Subject"]))) == "Сообщение с сайта от Анна"
+    assert mime["Reply-To"] == "anna@example.com"
+    assert "Здравствуйте!" in mime.get_payload()[0].get_payload(decode=True).decode("utf-8")
+
+
+def test_failed_writes_are_retried_without_logging_messages(storage, pipeline_settings, monkeypatch, caplog):
+    replace_many = storage.contact_messages.replace_many
+    failures = []
+
+    async def flaky_replace_many(documents):
+        if len(failures) < 4:
+            failures.append(len(documents))
+            raise ConnectionError("database unavailable")
+        return await replace_many(documents)
+
+    monkeypatch.setattr(storage.contact_messages, "replace_many", flaky_replace_many)
+
+    async def scenario():
+        pipeline = server.ContactPipeline()
+        messages = [contact(index) for index in range(3)]
+        for message in messages:
+            assert pipeline.submit(message)
+        await wait_until(lambda: len(pipeline_settings) == 3)
+        await pipeline.stop()
+        return messages
+
+    messages = asyncio.run(scenario())
+    stored = asyncio.run(storage.contact_messages.find())
+    assert sorted(document["id"] for document in stored) == sorted(message.id for message in messages)
+    assert len(failures) == 4
+    assert "Secret text" not in caplog.text
+
+
+def test_unstored_messages_are_spooled_at_shutdown_and_replayed(storage, pipeline_settings, monkeypatch):
+    replace_many = storage.contact_messages.replace_many
+
+    async def slow_replace_many(documents):
+        await asyncio.sleep(2)
+        return await replace_many(documents)
+
+    monkeypatch.setattr(storage.contact_messages, "replace_many", slow_replace_many)
+
+    async def shutdown_during_write():
+        pipeline = server.ContactPipeline()
+        messages = [contact(index) for index in range(5)]
+        for message in messages:
+            assert pipeline.submit(message)
+        await asyncio.sleep(0.05)
+        await pipeline.stop()
+        return messages
+
+    messages = asyncio.run(shutdown_during_write())
+    assert asyncio.run(storage.contact_messages.find()) == []
+    assert len(list(server.CONTACT_SPOOL_DIR.glob("*.ndjson"))) == 1
+    # No notification for a message that is not stored
+    assert pipeline_settings == []
+    assert asyncio.run(storage.email_dead_letters.find()) == []
+
+    monkeypatch.setattr(storage.contact_messages, "replace_many", replace_many)
+
+    async def restart():
+        pipeline = server.ContactPipeline()
+        pipeline.start()
+        await wait_until(lambda: len(pipeline_settings) == 5)
+        await pipeline.stop()
+
+    asyncio.run(restart())
+    stored = asyncio.run(storage.contact_messages.find())
+    assert sorted(document["id"] for document in stored) == sorted(message.id for message in messages)
+    assert sorted(pipeline_settings) == sorted(message.id for message in messages)
+    assert list(server.CONTACT_SPOOL_DIR.iterdir()) == []
+
+
+def test_emails_waiting_for_retry_are_dead_lettered_on_shutdown(storage, pipeline_settings, monkeypatch):
+    async def failing_email(message):
+        raise OSError("SMTP unavailable")
+
+    monkeypatch.setattr(server, "send_email_notification", failing_email)
+    monkeypatch.setattr(server, "EMAIL_BACKOFF_SECONDS", 60)
+
+    async def scenario():
+        pipeline = server.ContactPipeline()
+        message = contact()
+        assert pipeline.submit(message)
+        await wait_until(lambda: bool(pipeline._retries))
+        await pipeline.stop()
+        return message
+
+    message = asyncio.run(scenario())
+    assert [stored["id"] for stored in asyncio.run(storage.contact_messages.find())] == [message.id]
+    letters = asyncio.run(storage.email_dead_letters.find())
+    assert [(letter["id"], letter["attempts"]) for letter in letters] == [(message.id, 2)]
+
+
+def test_failing_dead_letter_store_does_not_stop_email_workers(storage, pipeline_settings, monkeypatch):
+    attempts = []
+
+    async def failing_email(message):
+        attempts.append(message.id)
+        raise OSError("SMTP unavailable")
+
+    async def failing_insert(document):
+        raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(server, "send_email_notification", failing_email)
+    monkeypatch.setattr(server, "EMAIL_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(storage.email_dead_letters, "insert_one", failing_insert)
+
+    async def scenario():
+        pipeline = server.ContactPipeline()
+        messages = [contact(index) for index in range(server.EMAIL_WORKERS + 2)]
+        for message in messages:
+            assert pipeline.submit(message)
+        await wait_until(lambda: len(attempts) == len(messages))
+        alive = [task for task in pipeline._tasks if not task.done()]
+        await pipeline.stop()
+        return alive
+
+    # The writer and every email worker are still running; the spool replay has finished
+    assert len(asyncio.run(scenario())) == 1 + server.EMAIL_WORKERS
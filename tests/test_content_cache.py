@@ -0,0 +1,177 @@
+"""
+The content cache serves public lists from memory and revalidates them
+against the database only while no change feed reports other workers' writes.
+"""
+
+import asyncio
+
+import pytest
+
+import server
+
+
+def city(city_id: str, name: str, day: int) -> dict:
+    return {"id": city_id, "name": name, "description": "", "created_at": f"2024-01-{day:02d}T00:00:00+00:00"}
+
+
+@pytest.fixture
+def counted_loads(storage):
+    loads = []
+
+    async def load_cities():
+        loads.append(None)
+        return await server.load_cities()
+
+    return loads, load_cities
+
+
+async def settle(cache):
+    # Lets background revalidations finish
+    for _ in range(100):
+        if not any(cache._loads.values()):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("revalidation did not finish")
+
+
+def test_cache_picks_up_writes_from_other_workers(storage, monkeypatch):
+    monkeypatch.setattr(server, "CONTENT_CACHE_TTL_SECONDS", 0.05)
+
+    async def scenario():
+        cache = server.ContentCache(server.CONTENT_COLLECTIONS)
+        invalidated = []
+        cache.add_listener(invalidated.append)
+        await storage.cities.insert_one(city("a", "Arzamas", 1))
+        first = await cache.get("cities", server.load_cities)
+        await asyncio.sleep(0.06)
+        # Expired but unchanged: same entry, no invalidation
+        unchanged = await cache.get("cities", server.load_cities)
+        await settle(cache)
+        # A write made by another worker does not invalidate this cache
+        await storage.cities.insert_one(city("b", "Balakhna", 2))
+        cached = await cache.get("cities", server.load_cities)
+        await asyncio.sleep(0.06)
+        # The expired entry is served while it is revalidated
+        stale = await cache.get("cities", server.load_cities)
+        await settle(cache)
+        reloaded = await cache.get("cities", server.load_cities)
+        return first, unchanged, cached, stale, reloaded, invalidated, cache.version("cities")
+
+    first, unchanged, cached, stale, reloaded, invalidated, version = asyncio.run(scenario())
+    assert unchanged is first
+    assert cached is first
+    assert stale is first
+    assert server.json.loads(reloaded.body)[1]["name"] == "Balakhna"
+    assert invalidated == [("cities",)]
+    assert reloaded.version == version == 1
+
+
+def test_expired_entry_is_revalidated_once(counted_loads, storage, monkeypatch):
+    monkeypatch.setattr(server, "CONTENT_CACHE_TTL_SECONDS", 0.05)
+    loads, load_cities = counted_loads
+
+    async def scenario():
+        cache = server.ContentCache(server.CONTENT_COLLECTIONS)
+        await storage.cities.insert_one(city("a", "Arzamas", 1))
+        first = await cache.get("cities", load_cities)
+        await asyncio.sleep(0.06)
+        served = await asyncio.gather(*(cache.get("cities", load_cities) for _ in range(10)))
+        await settle(cache)
+        return first, served
+
+    first, served = asyncio.run(scenario())
+    assert all(entry is first for entry in served)
+    assert len(loads) == 2
+
+
+def test_concurrent_misses_share_one_load(counted_loads, storage):
+    loads, load_cities = counted_loads
+
+    async def scenario():
+        cache = server.ContentCache(server.CONTENT_COLLECTIONS)
+        await storage.cities.insert_one(city("a", "Arzamas", 1))
+        return await asyncio.gather(*(cache.get("cities", load_cities) for _ in range(10)))
+
+    entries = asyncio.run(scenario())
+    assert all(entry is entries[0] for entry in entries)
+    assert len(loads) == 1
+
+
+def test_no_polling_while_change_feed_is_open(counted_loads, storage, monkeypatch):
+    monkeypatch.setattr(server, "CONTENT_CACHE_TTL_SECONDS", 0.01)
+    loads, load_cities = counted_loads
+
+    async def scenario():
+        cache = server.ContentCache(server.CONTENT_COLLECTIONS)
+        cache.change_feed = True
+        await storage.cities.insert_one(city("a", "Arzamas", 1))
+        first = await cache.get("cities", load_cities)
+        await asyncio.sleep(0.02)
+        again = await cache.get("cities", load_cities)
+        await settle(cache)
+        polled = len(loads)
+        # After the feed was interrupted, entries are checked once more
+        cache.expire()
+        await cache.get("cities", load_cities)
+        await settle(cache)
+        return first, again, polled
+
+    first, again, polled = asyncio.run(scenario())
+    assert again is first
+    assert polled == 1
+    assert len(loads) == 2
+
+
+def test_write_during_load_is_not_cached(storage):
+    async def scenario():
+        cache = server.ContentCache(server.CONTENT_COLLECTIONS)
+        await storage.cities.insert_one(city("a", "Arzamas", 1))
+
+        async def load_then_write():
+            cities = await server.load_cities()
+            cache.invalidate("cities")
+            return cities
+
+        await cache.get("cities", load_then_write)
+        await storage.cities.insert_one(city("b", "Balakhna", 2))
+        return await cache.get("cities", server.load_cities)
+
+    assert [item["id"] for item in server.json.loads(asyncio.run(scenario()).body)] == ["a", "b"]
+
+
+def test_variants_are_evicted_least_recently_used_first(counted_loads, storage, monkeypatch):
+    monkeypatch.setattr(server.ContentCache, "MAX_VARIANTS", 3)
+    loads, load_cities = counted_loads
+
+    async def scenario():
+        cache = server.ContentCache(server.CONTENT_COLLECTIONS)
+        await storage.cities.insert_one(city("a", "Arzamas", 1))
+        full = await cache.get("cities", load_cities)
+        await cache.get("cities", load_cities, "one")
+        await cache.get("cities", load_cities, "two")
+        await cache.get("cities", load_cities, "three")
+        for variant in range(10):
+            await cache.get("cities", load_cities, ("from", variant))
+        return full, await cache.get("cities", load_cities), list(cache._entries["cities"])
+
+    full, again, cached = asyncio.run(scenario())
+    # The unfiltered list was never evicted or reloaded
+    assert again is full
+    assert cached == [("from", 8), ("from", 9), None]
+    assert len(loads) == 4 + 10
+
+
+def test_recently_used_variant_is_kept(counted_loads, storage, monkeypatch):
+    monkeypatch.setattr(server.ContentCache, "MAX_VARIANTS", 3)
+    _, load_cities = counted_loads
+
+    async def scenario():
+        cache = server.ContentCache(server.CONTENT_COLLECTIONS)
+        await storage.cities.insert_one(city("a", "Arzamas", 1))
+        for variant in ("one", "two", "three"):
+            await cache.get("cities", load_cities, variant)
+        await cache.get("cities", load_cities, "one")
+        await cache.get("cities", load_cities, "four")
+        return list(cache._entries["cities"])
+
+    assert asyncio.run(scenario()) == ["three", "one", "four"]
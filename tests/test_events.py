@@ -0,0 +1,112 @@
+"""
+Event ids of the change feed are built from content every worker shares,
+so a reconnect to any worker only refetches the lists that changed.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import server
+
+
+@pytest.fixture
+def feed(storage, monkeypatch):
+    monkeypatch.setattr(server, "content_cache", server.ContentCache(server.CONTENT_COLLECTIONS))
+    monkeypatch.setattr(server, "EVENTS_MAX_STREAM_SECONDS", 0.05)
+
+    async def read_events(last_event_id=None):
+        headers = {"Last-Event-ID": last_event_id} if last_event_id else {}
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/events", headers=headers)
+        events = []
+        for block in response.text.split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+            if "event" in fields:
+                events.append((fields["event"], fields["id"], server.json.loads(fields["data"])))
+        return events
+
+    return read_events
+
+
+async def add_city(storage, city_id: str):
+    await storage.cities.insert_one({"id": city_id, "name": city_id, "description": "", "created_at": "2024-01-01T00:00:00+00:00"})
+
+
+def test_reconnect_only_reports_changed_lists(storage, feed):
+    async def scenario():
+        await add_city(storage, "a")
+        [(kind, event_id, data)] = await feed()
+        unchanged = await feed(event_id)
+        # Written by another worker; this one starts from an empty cache
+        await add_city(storage, "b")
+        server.content_cache = server.ContentCache(server.CONTENT_COLLECTIONS)
+        changed = await feed(event_id)
+        return kind, data, unchanged, changed
+
+    kind, data, unchanged, changed = asyncio.run(scenario())
+    assert kind == "ready"
+    assert data == {"resources": ["cities", "history", "culture"]}
+    assert unchanged == []
+    assert [(kind, data["resource"]) for kind, _, data in changed] == [("change", "cities")]
+
+
+def test_unknown_event_id_gets_reset(storage, feed):
+    [(kind, event_id, data)] = asyncio.run(feed("0123456789ab-3"))
+    assert kind == "reset"
+    assert data == {"resources": ["cities", "history", "culture"]}
+    assert server.parse_content_event_id(event_id) is not None
+
+
+def test_content_changes():
+    known = {"cities": "a" * 16, "history": "b" * 16, "culture": "c" * 16}
+    state = {**known, "history": "d" * 16}
+    event_id = server.content_event_id(state)
+    assert server.parse_content_event_id(event_id) == state
+    assert server.content_changes(known, state) == [{"id": event_id, "collection": "history_events", "resource": "history"}]
+    assert server.content_changes(state, state) == []
+
+
+def test_live_stream_reports_write(storage, feed, monkeypatch):
+    monkeypatch.setattr(server, "EVENTS_MAX_STREAM_SECONDS", 0.5)
+    monkeypatch.setattr(server, "EVENTS_COALESCE_SECONDS", 0.01)
+    server.content_cache.add_listener(server.event_broker.notify)
+
+    async def scenario():
+        stream = asyncio.ensure_future(feed())
+        while not server.event_broker.subscribers:
+            await asyncio.sleep(0.01)
+        await add_city(storage, "a")
+        server.content_cache.invalidate("cities")
+        return await stream
+
+    events = asyncio.run(scenario())
+    assert [kind for kind, _, _ in events] == ["ready", "change"]
+    assert events[1][2]["resource"] == "cities"
+    assert events[1][1] != events[0][1]
+
+
+def test_persistent_change_feed_errors_stop_the_watcher(storage, monkeypatch):
+    attempts = []
+
+    async def failing_watch(collections):
+        attempts.append(None)
+        raise PermissionError("not authorized to run changeStream")
+        yield
+
+    async def no_sleep(delay):
+        pass
+
+    cache = server.ContentCache(server.CONTENT_COLLECTIONS)
+    invalidated = []
+    cache.add_listener(invalidated.append)
+    monkeypatch.setattr(server, "content_cache", cache)
+    monkeypatch.setattr(storage, "watch", failing_watch)
+    monkeypatch.setattr(server.asyncio, "sleep", no_sleep)
+    asyncio.run(asyncio.wait_for(server.watch_content_changes(), 1))
+    assert len(attempts) == server.EVENTS_CHANGE_STREAM_ATTEMPTS
+    # Nothing was flushed and expiry keeps cached content current
+    assert invalidated == []
+    assert cache.change_feed is False
@@ -0,0 +1,46 @@
+"""
+History events are filtered by numeric year bounds parsed from their
+free-text year.
+"""
+
+import pytest
+
+import server
+
+
+@pytest.mark.parametrize("year, expected", [
+    ("1221", (1221, 1221)),
+    (" 1817 ", (1817, 1817)),
+    ("1941-1945", (1941, 1945)),
+    ("1508 – 1515", (1508, 1515)),
+    ("1960-е", (1960, 1969)),
+    ("1990-х", (1990, 1999)),
+    ("1920-е годы", (1920, 1929)),
+])
+def test_parse_year_range(year, expected):
+    assert server.parse_year_range(year) == expected
+
+
+@pytest.mark.parametrize("year", ["", "XVII век", "1945-1941", "около 1500 года"])
+def test_parse_year_range_rejects_unknown_formats(year):
+    with pytest.raises(ValueError):
+        server.parse_year_range(year)
+
+
+def test_unparsed_year_leaves_bounds_empty():
+    event = server.HistoryEvent(title="Legend", description="", year="XVII век")
+    assert (event.year_start, event.year_end) == (None, None)
+
+
+@pytest.mark.parametrize("year_from, year_to, century, expected", [
+    (None, None, None, {}),
+    (1500, None, None, {"year_end": {"$gte": 1500}}),
+    (None, 1600, None, {"year_start": {"$lte": 1600}}),
+    (1500, 1600, None, {"year_start": {"$lte": 1600}, "year_end": {"$gte": 1500}}),
+    (None, None, 19, {"year_start": {"$lte": 1900}, "year_end": {"$gte": 1801}}),
+    # An explicit range narrows the century
+    (1850, 1950, 19, {"year_start": {"$lte": 1900}, "year_end": {"$gte": 1850}}),
+    (1700, 1820, 19, {"year_start": {"$lte": 1820}, "year_end": {"$gte": 1801}}),
+])
+def test_history_query(year_from, year_to, century, expected):
+    assert server.history_query(year_from, year_to, century) == expected
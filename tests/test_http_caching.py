@@ -0,0 +1,62 @@
+"""
+Public lists carry a strong ETag built from their body and answer a
+matching If-None-Match with 304 Not Modified.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import server
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (None, False),
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", "abc"', True),
+    ('"abc-gzip"', True),
+    ("*", True),
+    ('"other"', False),
+    ("abc", False),
+])
+def test_etag_matches(if_none_match, expected):
+    assert server.etag_matches(if_none_match, ['"abc"', '"abc-gzip"']) is expected
+
+
+@pytest.fixture
+def api(storage, monkeypatch):
+    monkeypatch.setattr(server, "content_cache", server.ContentCache(server.CONTENT_COLLECTIONS))
+
+    async def get(path, **headers):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return get
+
+
+def test_not_modified_until_content_changes(storage, api):
+    async def scenario():
+        await storage.culture_items.insert_one({"id": "c1", "title": "Khokhloma", "description": "", "category": "craft"})
+        first = await api("/api/culture")
+        repeated = await api("/api/culture", **{"If-None-Match": first.headers["etag"]})
+        # A validator of another encoding of the same content matches too
+        weak = await api("/api/culture", **{"If-None-Match": f'W/{first.headers["etag"][:-1]}-gzip"'})
+        await storage.culture_items.insert_one({"id": "c2", "title": "Gorodets painting", "description": "", "category": "craft"})
+        server.content_cache.invalidate("culture_items")
+        changed = await api("/api/culture", **{"If-None-Match": first.headers["etag"]})
+        return first, repeated, weak, changed
+
+    first, repeated, weak, changed = asyncio.run(scenario())
+    assert first.status_code == 200
+    assert first.headers["etag"].startswith('"')
+    assert "max-age" in first.headers["cache-control"]
+    assert (repeated.status_code, repeated.content) == (304, b"")
+    assert repeated.headers["etag"] == first.headers["etag"]
+    assert weak.status_code == 304
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != first.headers["etag"]
+    assert [item["id"] for item in changed.json()] == ["c1", "c2"]
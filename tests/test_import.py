@@ -0,0 +1,70 @@
+"""
+NDJSON imports are read line by line from the request stream; bad lines
+are reported by number and do not stop the import.
+"""
+
+import asyncio
+import json
+
+import httpx
+
+import server
+
+
+def read_lines(chunks, monkeypatch, max_line_bytes=16):
+    monkeypatch.setattr(server, "IMPORT_MAX_LINE_BYTES", max_line_bytes)
+
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in server.iter_ndjson_lines(stream())]
+
+    return asyncio.run(collect())
+
+
+def test_lines_split_across_chunks(monkeypatch):
+    lines = read_lines([b'{"a"', b':1}\n{"b":2}\n', b"\n", b'{"c":3}'], monkeypatch)
+    assert lines == [(1, b'{"a":1}'), (2, b'{"b":2}'), (3, b""), (4, b'{"c":3}')]
+
+
+def test_oversized_lines_are_skipped(monkeypatch):
+    long = b"x" * 40
+    lines = read_lines([b'{"a":1}\n', long[:20], long[20:] + b'\n{"b":2}\n', long], monkeypatch)
+    assert lines == [(1, b'{"a":1}'), (2, None), (3, b'{"b":2}'), (4, None)]
+
+
+def test_oversized_line_in_one_chunk(monkeypatch):
+    lines = read_lines([b"y" * 40 + b'\n{"a":1}\n'], monkeypatch)
+    assert lines == [(1, None), (2, b'{"a":1}')]
+
+
+def test_import_reports_invalid_lines(storage, monkeypatch):
+    monkeypatch.setattr(server, "content_cache", server.ContentCache(server.CONTENT_COLLECTIONS))
+    monkeypatch.setattr(server, "IMPORT_MAX_LINE_BYTES", 200)
+    body = b"\n".join([
+        json.dumps({"id": "c1", "title": "Khokhloma", "description": "Painted wood", "category": "craft", "created_at": "2024-01-01T00:00:00+00:00"}).encode(),
+        b"{not json",
+        b"[1, 2]",
+        json.dumps({"title": "Missing description"}).encode(),
+        b"",
+        json.dumps({"title": "x" * 300, "description": "", "category": "craft", "created_at": "2024-01-01T00:00:00+00:00"}).encode(),
+        json.dumps({"id": "c2", "title": "Gorodets", "description": "Painting", "category": "craft", "created_at": "2024-01-01T00:00:00+00:00"}).encode(),
+    ])
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", auth=("admin", "admin123")) as client:
+            first = await client.post("/api/admin/import/culture", content=body)
+            again = await client.post("/api/admin/import/culture", content=body)
+        return first.json(), again.json(), await storage.culture_items.find(sort=[("id", 1)])
+
+    first, again, stored = asyncio.run(scenario())
+    assert (first["inserted"], first["updated"], first["error_count"]) == (2, 0, 4)
+    assert [error["line"] for error in first["errors"]] == [2, 3, 4, 6]
+    assert first["errors"][0]["error"].startswith("Invalid JSON")
+    assert first["errors"][3]["error"] == "Line exceeds 200 bytes"
+    # Imports replace by id
+    assert (again["inserted"], again["updated"]) == (0, 0)
+    assert [item["id"] for item in stored] == ["c1", "c2"]
@@ -0,0 +1,87 @@
+"""
+Search matches Russian word forms through a small stemmer, completes the
+word being typed and ranks documents matching more query words first.
+"""
+
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.mark.parametrize("word, stem", [
+    ("кремль", "кремл"),
+    ("кремля", "кремл"),
+    ("ярмарки", "ярмарк"),
+    ("ярмарка", "ярмарк"),
+    ("городецкая", "городецк"),
+    ("росписью", "роспис"),
+    # A stem keeps at least two letters, and words without Cyrillic are kept
+    ("ия", "ия"),
+    ("kremlin", "kremlin"),
+    ("1221", "1221"),
+])
+def test_stem_word(word, stem):
+    assert server.stem_word(word) == stem
+
+
+def test_search_terms():
+    text = "Нижегородский Кремль и ярмарка, 1817 год. Ёлка"
+    assert server.search_terms(text) == [
+        ("нижегород", 0, 13),
+        ("кремл", 14, 20),
+        ("ярмарк", 23, 30),
+        ("1817", 32, 36),
+        ("год", 37, 40),
+        ("елк", 42, 46),
+    ]
+
+
+@pytest.fixture
+def index(storage, monkeypatch):
+    monkeypatch.setattr(server, "content_cache", server.ContentCache(server.CONTENT_COLLECTIONS))
+
+    async def build():
+        await storage.cities.insert_one({
+            "id": "nn", "name": "Нижний Новгород", "description": "Город на слиянии Оки и Волги.",
+            "attractions": [{"name": "Нижегородский кремль", "description": "Крепость XVI века на берегу Волги."}],
+        })
+        await storage.history_events.insert_one({
+            "id": "fair", "title": "Перенос ярмарки", "description": "Макарьевская ярмарка переехала в Нижний Новгород.", "year": "1817",
+        })
+        await storage.culture_items.insert_one({
+            "id": "painting", "title": "Городецкая роспись", "description": "Роспись по дереву из Городца на Волге.", "category": "craft",
+        })
+        search_index = server.SearchIndex()
+        await search_index.ensure_current()
+        return search_index
+
+    return asyncio.run(build())
+
+
+def test_word_forms_match(index):
+    total, results = index.search("кремля ")
+    assert total == 1
+    assert [(result["type"], result["title"]) for result in results] == [("attraction", "Нижегородский кремль")]
+    assert results[0]["city"] == "Нижний Новгород"
+
+
+def test_last_word_matches_as_prefix_while_typing(index):
+    assert [result["id"] for result in index.search("ярм")[1]] == ["fair"]
+    # A finished word does not complete
+    assert index.search("ярм ")[0] == 0
+
+
+def test_documents_matching_more_words_rank_first(index):
+    total, results = index.search("Волга Новгород")
+    assert total == 4
+    # The city matches both words; a title match outweighs a description match
+    assert results[0]["id"] == "nn"
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_type_filter_and_snippet(index):
+    total, results = index.search("волге", types={"culture"})
+    assert total == 1
+    assert results[0]["snippet"] == "Роспись по дереву из Городца на Волге."
@@ -0,0 +1,221 @@
+"""
+The in-memory and SQLite backends evaluate the MongoDB filter subset
+themselves. Every scenario runs against both and must give the same result,
+which is also checked against the expected one.
+"""
+
+import asyncio
+
+import pytest
+
+import server
+from storage import MemoryStorage, SQLiteStorage
+
+
+def run_on_backends(tmp_path, scenario):
+    results = []
+    for storage in (MemoryStorage(), SQLiteStorage(str(tmp_path / "test.sqlite3"))):
+        try:
+            results.append(asyncio.run(scenario(storage)))
+        finally:
+            storage.close()
+    assert results[0] == results[1]
+    return results[0]
+
+
+def contact_message(index: int, created_at: str, email: str = "a@example.com") -> dict:
+    return {"id": f"m{index:03d}", "name": f"Name {index}", "email": email, "message": "text", "created_at": created_at}
+
+
+# Pairs of messages share a timestamp, so pages must break ties on id
+CONTACT_MESSAGES = [
+    contact_message(index, f"2024-01-{index // 2 + 1:02d}T10:00:00+00:00", "b@example.com" if index % 3 else "a@example.com")
+    for index in range(23)
+]
+
+
+def expected_contact_ids(messages) -> list:
+    ordered = sorted(messages, key=lambda message: (message["created_at"], message["id"]), reverse=True)
+    return [message["id"] for message in ordered]
+
+
+async def contact_pages(storage, page_size: int, **filters) -> list:
+    await storage.contact_messages.insert_many(CONTACT_MESSAGES)
+    pages = []
+    cursor = None
+    while True:
+        query = server.contact_messages_query(cursor, **filters)
+        messages = await storage.contact_messages.find(query, sort=server.CONTACT_SORT, limit=page_size)
+        if not messages:
+            return pages
+        pages.append([message["id"] for message in messages])
+        cursor = server.encode_contact_cursor(messages[-1])
+
+
+def test_contact_keyset_pages_cover_every_message_once(tmp_path):
+    pages = run_on_backends(tmp_path, lambda storage: contact_pages(storage, 5))
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert sum(pages, []) == expected_contact_ids(CONTACT_MESSAGES)
+
+
+def test_contact_keyset_pages_with_filters(tmp_path):
+    from datetime import datetime, timezone
+
+    created_from = datetime(2024, 1, 3, tzinfo=timezone.utc)
+    created_to = datetime(2024, 1, 10, tzinfo=timezone.utc)
+    pages = run_on_backends(
+        tmp_path,
+        lambda storage: contact_pages(storage, 2, created_from=created_from, created_to=created_to, email="b@example.com"),
+    )
+    expected = [
+        message for message in CONTACT_MESSAGES
+        if message["email"] == "b@example.com" and "2024-01-03" <= message["created_at"] < "2024-01-10"
+    ]
+    assert sum(pages, []) == expected_contact_ids(expected)
+
+
+HISTORY_EVENTS = [
+    {"id": "h1", "title": "Founding", "year": "1221"},
+    {"id": "h2", "title": "Fair", "year": "1817"},
+    {"id": "h3", "title": "War", "year": "1941-1945"},
+    {"id": "h4", "title": "Sixties", "year": "1960-е"},
+    {"id": "h5", "title": "Kremlin", "year": "1508-1515"},
+    {"id": "h6", "title": "Century turn", "year": "1899-1901"},
+]
+
+
+@pytest.mark.parametrize("year_from, year_to, century, expected", [
+    (None, None, None, ["h1", "h5", "h2", "h6", "h3", "h4"]),
+    (None, None, 19, ["h2", "h6"]),
+    (None, None, 20, ["h6", "h3", "h4"]),
+    (1500, 1950, None, ["h5", "h2", "h6", "h3"]),
+    (1945, None, None, ["h3", "h4"]),
+    (None, 1221, None, ["h1"]),
+    (1600, 1800, None, []),
+])
+def test_history_range(tmp_path, year_from, year_to, century, expected):
+    async def scenario(storage):
+        documents = []
+        for event in HISTORY_EVENTS:
+            year_start, year_end = server.parse_year_range(event["year"])
+            documents.append({**event, "year_start": year_start, "year_end": year_end})
+        await storage.history_events.insert_many(documents)
+        query = server.history_query(year_from, year_to, century)
+        return [event["id"] for event in await storage.history_events.find(query, ("id",), sort=server.HISTORY_SORT)]
+
+    assert run_on_backends(tmp_path, scenario) == expected
+
+
+def test_missing_fields_are_backfilled(tmp_path):
+    async def scenario(storage):
+        await storage.history_events.insert_many([
+            {"id": "old", "title": "Old", "year": "1612"},
+            {"id": "new", "title": "New", "year": "1700", "year_start": 1700, "year_end": 1700},
+            {"id": "empty", "title": "Unparsed", "year": "?", "year_start": None, "year_end": None},
+        ])
+        missing = await storage.history_events.find({"year_start": {"$exists": False}}, ("id", "year"))
+        await storage.history_events.set_fields([(event["id"], {"year_start": 1612, "year_end": 1612}) for event in missing])
+        after = await storage.history_events.find({"year_start": {"$exists": False}})
+        present = await storage.history_events.find({"year_start": {"$exists": True}}, ("id", "year_start"), sort=[("id", 1)])
+        return [event["id"] for event in missing], after, present
+
+    missing, after, present = run_on_backends(tmp_path, scenario)
+    # A stored null counts as existing, as in MongoDB
+    assert missing == ["old"]
+    assert after == []
+    assert present == [
+        {"id": "empty", "year_start": None},
+        {"id": "new", "year_start": 1700},
+        {"id": "old", "year_start": 1612},
+    ]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ({"category": "craft"}, ["c5", "c1", "c2"]),
+    ({"category": {"$ne": "craft"}}, ["c4", "c3", "c6"]),
+    ({"category": {"$in": ["craft", "nature"]}}, ["c5", "c1", "c3", "c2", "c6"]),
+    ({"rank": {"$gt": 1, "$lte": 3}}, ["c3", "c2", "c6"]),
+    # Like MongoDB, null matches a stored null and a missing field
+    ({"rank": None}, ["c4", "c5"]),
+    ({"rank": {"$ne": None}}, ["c1", "c3", "c2", "c6"]),
+    ({"$or": [{"rank": {"$lt": 2}}, {"category": "nature"}]}, ["c1", "c3", "c6"]),
+    ({"$and": [{"category": "craft"}, {"rank": {"$gte": 2}}]}, ["c2"]),
+    ({"tags": {"$exists": True}}, ["c1", "c6"]),
+])
+def test_filters_and_sorts_agree(tmp_path, query, expected):
+    async def scenario(storage):
+        await storage.culture_items.insert_many([
+            {"id": "c1", "category": "craft", "rank": 1, "tags": ["wood"]},
+            {"id": "c2", "category": "craft", "rank": 3},
+            {"id": "c3", "category": "nature", "rank": 2},
+            {"id": "c4", "category": "tradition", "rank": None},
+            {"id": "c5", "category": "craft"},
+            {"id": "c6", "category": "nature", "rank": 3, "tags": []},
+        ])
+        ascending = await storage.culture_items.find(query, ("id",), sort=[("rank", 1), ("id", 1)])
+        descending = await storage.culture_items.find(query, ("id",), sort=[("rank", -1), ("id", 1)], limit=3)
+        return [item["id"] for item in ascending], [item["id"] for item in descending]
+
+    ascending, descending = run_on_backends(tmp_path, scenario)
+    assert ascending == expected
+    assert len(descending) == min(3, len(expected))
+
+
+def test_upsert_counts_and_insert_only_fields(tmp_path):
+    def cities(description: str):
+        return [
+            {"id": f"new-{name}", "name": name, "description": description if name == "Arzamas" else name}
+            for name in ("Arzamas", "Gorodets", "Semyonov")
+        ]
+
+    async def scenario(storage):
+        first = await storage.cities.upsert_many(cities("old"), ["name"], insert_only=["id"])
+        repeated = await storage.cities.upsert_many(cities("old"), ["name"], insert_only=["id"])
+        changed = await storage.cities.upsert_many(cities("new") + [{"id": "x", "name": "Vyksa", "description": ""}], ["name"], insert_only=["id"])
+        documents = await storage.cities.find(sort=[("name", 1)])
+        return first, repeated, changed, documents
+
+    first, repeated, changed, documents = run_on_backends(tmp_path, scenario)
+    assert first == (3, 0)
+    assert repeated == (0, 0)
+    assert changed == (1, 1)
+    assert [(city["id"], city["description"]) for city in documents] == [
+        ("new-Arzamas", "new"), ("new-Gorodets", "Gorodets"), ("new-Semyonov", "Semyonov"), ("x", ""),
+    ]
+
+
+def test_increment_creates_and_adds(tmp_path):
+    async def scenario(storage):
+        views = storage.content_views
+        await views.increment("views", [("city:a", 2, {"type": "city", "city_id": "a"})])
+        await views.increment("views", [
+            ("city:a", 3, {"type": "city", "city_id": "a"}),
+            ("attraction:a:Kremlin", 1, {"type": "attraction", "city_id": "a", "attraction": "Kremlin"}),
+        ])
+        return await views.find({"type": "city"}, sort=[("views", -1)]), await views.find({}, ("id", "views"), sort=[("id", 1)])
+
+    cities, counters = run_on_backends(tmp_path, scenario)
+    assert cities == [{"id": "city:a", "type": "city", "city_id": "a", "views": 5}]
+    assert counters == [{"id": "attraction:a:Kremlin", "views": 1}, {"id": "city:a", "views": 5}]
+
+
+
+def test_incomplete_backend_fails_when_created():
+    from storage import Repository, Storage
+
+    class NoDropStorage(Storage):
+        def _open(self, collection):
+            return None
+
+    class ReadOnlyRepository(Repository):
+        async def find(self, query=None, fields=None, sort=None, limit=None):
+            return []
+
+    with pytest.raises(TypeError, match="drop"):
+        NoDropStorage()
+    with pytest.raises(TypeError, match="insert_one"):
+        ReadOnlyRepository()
+    # The shipped backends implement the whole interface
+    for storage in (MemoryStorage(), SQLiteStorage(":memory:")):
+        assert storage.cities is not None
+        storage.close()